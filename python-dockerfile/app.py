@@ -5,7 +5,13 @@ import datetime
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import random
+import numpy as np
+from booking_store import BookingStore
+from connections import MAX_STOPS, MIN_CONNECTION, ConnectionGraph
+from ids import new_id
+from inventory import CITY_COORDINATES, FlightInventory
+from notifications import REMINDER_LEAD, NotificationQueue
+from seats import SeatInventory, flight_key
 
 # Page configuration
 st.set_page_config(
@@ -76,55 +82,136 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'bookings' not in st.session_state:
-    st.session_state.bookings = []
 if 'user_info' not in st.session_state:
     st.session_state.user_info = {}
+if 'booking_ids' not in st.session_state:
+    st.session_state.booking_ids = []   # bookings made in this session
 if 'search_results' not in st.session_state:
     st.session_state.search_results = []
 
-# Sample flight data
-def generate_flight_data():
-    cities = ['New York', 'Los Angeles', 'Chicago', 'Miami', 'London', 'Paris', 
-              'Tokyo', 'Dubai', 'Sydney', 'Singapore', 'Delhi', 'Frankfurt']
-    
-    flights = []
-    airlines = ['SkyWings Airlines', 'Global Airways', 'Oceanic Airlines', 'Continental Express']
-    
-    for i in range(50):
-        departure = random.choice(cities)
-        arrival = random.choice([c for c in cities if c != departure])
-        departure_time = datetime.now() + timedelta(days=random.randint(1, 30), 
-                                                   hours=random.randint(0, 23))
-        duration = timedelta(hours=random.randint(1, 12))
-        arrival_time = departure_time + duration
-        
-        flight = {
-            'flight_number': f'SW{random.randint(1000, 9999)}',
-            'airline': random.choice(airlines),
-            'departure_city': departure,
-            'arrival_city': arrival,
-            'departure_time': departure_time,
-            'arrival_time': arrival_time,
-            'duration': duration,
-            'price': round(random.uniform(150, 1500), 2),
-            'available_seats': random.randint(5, 200),
-            'aircraft_type': random.choice(['Boeing 737', 'Airbus A320', 'Boeing 787', 'Airbus A350']),
-            'class': random.choice(['Economy', 'Premium Economy', 'Business', 'First'])
-        }
-        flights.append(flight)
-    
-    return pd.DataFrame(flights)
+# Flight inventory - built once per process and shared by all sessions;
+# set FLIGHT_SCHEDULE to serve a CSV/Parquet schedule, FLIGHT_SEED for a
+# reproducible random one and FLIGHT_INVENTORY_TTL (seconds) to rebuild it
+# periodically
+@st.cache_resource
+def flight_inventory():
+    return FlightInventory()
+
+# Connection search graph over the current schedule, rebuilt when a reload
+# or TTL expiry bumps the inventory version
+@st.cache_resource(max_entries=1)
+def connection_graph(version):
+    return ConnectionGraph(flight_inventory().store())
+
+# Bookings database shared by all sessions; BOOKINGS_DB sets its path
+@st.cache_resource
+def booking_store():
+    return BookingStore()
+
+# Seats sold and held across every session in the process, starting from
+# the confirmed bookings already in the booking store
+@st.cache_resource
+def seat_inventory():
+    return SeatInventory(sold=booking_store().sold_seats())
+
+# Background email worker pool; SMTP_HOST selects the relay, otherwise
+# mail goes to a local SMTP stand-in
+@st.cache_resource
+def notification_queue():
+    queue = NotificationQueue.from_env()
+    # Reminders only live in the queue, so on start-up those of confirmed
+    # bookings that haven't departed yet are queued again
+    for booking in booking_store().upcoming(datetime.now()):
+        schedule_reminder(booking, queue)
+    return queue
+
+# Queue a booking email without waiting for it to be sent
+def notify(kind, booking, delay=0, job_id=None, queue=None):
+    flight, passenger = booking['flight'], booking['passenger']
+    return (queue or notification_queue()).submit(kind, passenger['email'], {
+        'booking_id': booking['booking_id'],
+        'first_name': passenger['first_name'],
+        'flight_number': flight['flight_number'],
+        'departure_city': flight['departure_city'],
+        'arrival_city': flight['arrival_city'],
+        'departure': flight['departure_time'].strftime('%b %d, %Y %H:%M'),
+    }, delay=delay, job_id=job_id)
+
+# A booking's reminder, due REMINDER_LEAD before departure (right away if
+# that has passed), named so cancelling the booking can drop it
+def schedule_reminder(booking, queue=None):
+    reminder_at = booking['flight']['departure_time'] - timedelta(seconds=REMINDER_LEAD)
+    return notify('reminder', booking, delay=(reminder_at - datetime.now()).total_seconds(),
+                  job_id=f"reminder-{booking['booking_id']}", queue=queue)
+
+PAGES = ["🏠 Home", "🔍 Find Flights", "📋 My Bookings", "📊 Analytics", "👤 Profile"]
+PAGE_SIZE = 20   # result cards rendered per page
+BOOKINGS_PAGE_SIZE = 10
+STATUS_COLORS = {'Confirmed': 'green', 'Cancelled': 'red'}
+SCATTER_POINTS = 2000
+SORT_KEYS = {
+    'Price: Low to High': ('price', False),
+    'Price: High to Low': ('price', True),
+    'Duration': ('duration', False),
+    'Departure Time': ('departure_time', False),
+}
+
+# One map with every route on the current results page
+def route_map(flights_df):
+    routes = flights_df[['departure_city', 'arrival_city']].drop_duplicates()
+    lat, lon = [], []
+    for departure, arrival in routes.itertuples(index=False):
+        if departure in CITY_COORDINATES and arrival in CITY_COORDINATES:
+            for city in (departure, arrival):
+                lat.append(CITY_COORDINATES[city][0])
+                lon.append(CITY_COORDINATES[city][1])
+            lat.append(None)
+            lon.append(None)
+    cities = [city for city in pd.unique(routes.to_numpy().ravel()) if city in CITY_COORDINATES]
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scattergeo(lat=lat, lon=lon, mode='lines',
+                                line=dict(width=2, color='blue'), hoverinfo='skip'))
+    fig.add_trace(go.Scattergeo(lat=[CITY_COORDINATES[city][0] for city in cities],
+                                lon=[CITY_COORDINATES[city][1] for city in cities],
+                                mode='markers+text', text=cities, textposition='top center',
+                                marker=dict(size=8, color='red')))
+    fig.update_layout(
+        geo=dict(
+            showland=True,
+            landcolor="rgb(243, 243, 243)",
+            countrycolor="rgb(204, 204, 204)",
+            projection_type="natural earth",
+        ),
+        height=350,
+        margin=dict(l=0, r=0, t=0, b=0),
+        showlegend=False
+    )
+    return fig
+
+# Navigation - pages redirect by setting st.session_state.page; the radio
+# follows those redirects (showing no selection on pages outside it, like
+# the booking form) and choosing a page in it overrides them
+def _navigate():
+    st.session_state.page = st.session_state.navigation
 
-# Navigation
 def navigation():
     st.sidebar.markdown("# ✈️ SkyWings Booking")
     st.sidebar.title("SkyWings Booking")
-    page = st.sidebar.radio(
-        "Navigation",
-        ["🏠 Home", "🔍 Find Flights", "📋 My Bookings", "📊 Analytics", "👤 Profile"]
-    )
-    return page
+    st.session_state.navigation = st.session_state.page if st.session_state.page in PAGES else None
+    st.sidebar.radio("Navigation", PAGES, key='navigation', on_change=_navigate)
+    
+    st.sidebar.markdown("---")
+    inventory = flight_inventory()
+    st.sidebar.caption(f"Flight schedule updated "
+                       f"{datetime.fromtimestamp(inventory.built_at).strftime('%b %d, %H:%M')}")
+    if st.sidebar.button("🔄 Reload Flights"):
+        inventory.reload()
+    metrics = notification_queue().metrics()
+    latency = metrics['latency'].get('confirmation')
+    st.sidebar.caption(f"📬 {metrics['queued']} emails queued • {metrics['scheduled']} reminders scheduled"
+                       + (f" • p95 {latency['p95'] * 1000:.0f} ms" if latency else ""))
+    return st.session_state.page
 
 # Home Page
 def home_page():
@@ -225,7 +312,8 @@ def search_flights():
             airline = st.multiselect("Airlines", 
                                    ['SkyWings Airlines', 'Global Airways', 
                                     'Oceanic Airlines', 'Continental Express'],
-                                   default=['SkyWings Airlines', 'Global Airways'])
+                                   default=['SkyWings Airlines', 'Global Airways'],
+                                   help="Leave empty to search every airline")
         
         with col2:
             arrival = st.selectbox("Arrival City", 
@@ -239,41 +327,41 @@ def search_flights():
             sort_by = st.selectbox("Sort by", 
                                  ['Price: Low to High', 'Price: High to Low', 
                                   'Duration', 'Departure Time'])
+            show_connections = st.checkbox("Show connecting itineraries")
+    
+    # One page of matches from the shared schedule's search index, decoding
+    # only the flights that are shown
+    store = flight_inventory().store()
+    by, descending = SORT_KEYS[sort_by]
+    filters = dict(
+        departure=None if departure == 'Any' else departure,
+        arrival=None if arrival == 'Any' else arrival,
+        airlines=airline,
+        flight_class=None if flight_class == 'Any' else flight_class,
+        price_range=price_range)
+    total, _ = store.index.search(**filters, k=0)
     
-    # Generate sample flights
-    flights_df = generate_flight_data()
-    
-    # Apply filters
-    if departure != 'Any':
-        flights_df = flights_df[flights_df['departure_city'] == departure]
-    if arrival != 'Any':
-        flights_df = flights_df[flights_df['arrival_city'] == arrival]
-    if airline:
-        flights_df = flights_df[flights_df['airline'].isin(airline)]
-    if flight_class != 'Any':
-        flights_df = flights_df[flights_df['class'] == flight_class]
-    
-    flights_df = flights_df[(flights_df['price'] >= price_range[0]) & 
-                           (flights_df['price'] <= price_range[1])]
-    
-    # Sort results
-    if sort_by == 'Price: Low to High':
-        flights_df = flights_df.sort_values('price')
-    elif sort_by == 'Price: High to Low':
-        flights_df = flights_df.sort_values('price', ascending=False)
-    elif sort_by == 'Duration':
-        flights_df = flights_df.sort_values('duration')
-    else:
-        flights_df = flights_df.sort_values('departure_time')
+    # Display results
+    st.subheader(f"📋 Found {total:,} Flights")
+    page_count = max(1, -(-total // PAGE_SIZE))
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1)
+    with col2:
+        st.caption(f"Page {page} of {page_count:,}")
     
+    _, positions = store.index.search(**filters, by=by, descending=descending,
+                                      k=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+    flights_df = store.take(positions)
     st.session_state.search_results = flights_df.to_dict('records')
     
-    # Display results
-    st.subheader(f"📋 Found {len(flights_df)} Flights")
-    
     if not flights_df.empty:
-        for idx, flight in flights_df.iterrows():
-            col1, col2, col3 = st.columns([3, 2, 1])
+        st.plotly_chart(route_map(flights_df), use_container_width=True)
+        seats = seat_inventory()
+        
+        for position, (_, flight) in zip(positions, flights_df.iterrows()):
+            seats_left = seats.available(flight_key(flight), flight['available_seats'])
+            col1, col2 = st.columns([4, 1])
             
             with col1:
                 st.markdown(f"""
@@ -283,34 +371,11 @@ def search_flights():
                     <p>🛫 {flight['departure_time'].strftime('%b %d, %Y %H:%M')}</p>
                     <p>🛬 {flight['arrival_time'].strftime('%b %d, %Y %H:%M')}</p>
                     <p>⏱️ {str(flight['duration'])[:4]} hours • {flight['class']} Class</p>
-                    <p>✈️ {flight['aircraft_type']} • 🪑 {flight['available_seats']} seats left</p>
+                    <p>✈️ {flight['aircraft_type']} • 🪑 {seats_left} seats left</p>
                 </div>
                 """, unsafe_allow_html=True)
             
             with col2:
-                # Flight path visualization
-                fig = go.Figure(go.Scattergeo(
-                    lon = [random.randint(-180, 180), random.randint(-180, 180)],
-                    lat = [random.randint(-90, 90), random.randint(-90, 90)],
-                    mode = 'lines+markers',
-                    line = dict(width=2, color='blue'),
-                    marker = dict(size=8, color=['green', 'red']),
-                    text = [flight['departure_city'], flight['arrival_city']],
-                ))
-                
-                fig.update_layout(
-                    geo=dict(
-                        showland=True,
-                        landcolor="rgb(243, 243, 243)",
-                        countrycolor="rgb(204, 204, 204)",
-                    ),
-                    height=150,
-                    margin=dict(l=0, r=0, t=0, b=0),
-                    showlegend=False
-                )
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with col3:
                 st.markdown(f"""
                 <div style="text-align: center;">
                     <h2 style="color: #3B82F6;">${flight['price']}</h2>
@@ -318,7 +383,7 @@ def search_flights():
                 </div>
                 """, unsafe_allow_html=True)
                 
-                if st.button(f"Book Now", key=f"book_{idx}"):
+                if st.button(f"Book Now", key=f"book_{position}"):
                     st.session_state.selected_flight = flight.to_dict()
                     st.session_state.page = "booking_form"
                     st.rerun()
@@ -326,6 +391,52 @@ def search_flights():
             st.markdown("---")
     else:
         st.warning("No flights found matching your criteria. Try adjusting your filters.")
+    
+    if show_connections:
+        connecting_itineraries(departure, arrival)
+
+# Itineraries with up to MAX_STOPS connections between two cities on one
+# day, from the time-expanded connection graph
+def connecting_itineraries(departure, arrival):
+    st.subheader("🔁 Connecting Itineraries")
+    if departure == 'Any' or arrival == 'Any' or departure == arrival:
+        st.info("Choose two different departure and arrival cities to search connections.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        travel_date = st.date_input("Travel Date", datetime.now() + timedelta(days=1))
+    with col2:
+        max_stops = st.selectbox("Max Stops", list(range(MAX_STOPS + 1)), index=1)
+    with col3:
+        rank = st.selectbox("Rank by", ['Price', 'Duration'])
+    st.caption(f"Any airline and class • at least {MIN_CONNECTION // 60} minutes per connection")
+    
+    inventory = flight_inventory()
+    store = inventory.store()
+    start = int(np.datetime64(travel_date, 's').astype('int64'))
+    itineraries = connection_graph(inventory.version).search(
+        departure, arrival, start, start + 24 * 60 * 60 - 1, max_stops=max_stops,
+        rank=rank.lower(), k=PAGE_SIZE)
+    if itineraries.empty:
+        st.warning("No itineraries found for that day.")
+        return
+    
+    for itinerary in itineraries.itertuples(index=False):
+        legs = store.take(itinerary.legs)
+        stops = 'Nonstop' if itinerary.stops == 0 else f"{itinerary.stops} stop{'s' * (itinerary.stops > 1)}"
+        lines = ''.join(
+            f"<p>{leg['flight_number']} • {leg['airline']} • {leg['departure_city']} "
+            f"{leg['departure_time'].strftime('%b %d %H:%M')} → {leg['arrival_city']} "
+            f"{leg['arrival_time'].strftime('%b %d %H:%M')}</p>"
+            for _, leg in legs.iterrows())
+        st.markdown(f"""
+        <div class="flight-card">
+            <h4>{itinerary.route}</h4>
+            <p><strong>${itinerary.price:,.2f}</strong> • ⏱️ {itinerary.duration_hours:.1f} hours • {stops}</p>
+            {lines}
+        </div>
+        """, unsafe_allow_html=True)
 
 # Booking Form
 def booking_form():
@@ -337,6 +448,23 @@ def booking_form():
     
     st.title("📝 Complete Your Booking")
     
+    # Hold a seat while the form is open; an abandoned form's hold lapses
+    seats = seat_inventory()
+    key, capacity = flight_key(flight), int(flight['available_seats'])
+    hold = st.session_state.get('seat_hold')
+    if not hold or hold['key'] != key:
+        if hold:
+            seats.release(hold['id'])
+        hold_id = seats.hold(key, capacity)
+        if hold_id is None:
+            st.session_state.pop('seat_hold', None)
+            st.error("Sorry, this flight is sold out.")
+            return
+        hold = st.session_state.seat_hold = {
+            'id': hold_id, 'key': key,
+            'until': datetime.now() + timedelta(seconds=seats.hold_ttl)}
+    st.caption(f"🪑 Your seat is held until {hold['until'].strftime('%H:%M')}")
+    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -385,14 +513,19 @@ def booking_form():
                 submit = st.form_submit_button("Confirm Booking", type="primary")
             with col2:
                 if st.form_submit_button("Cancel"):
+                    seats.release(st.session_state.pop('seat_hold')['id'])
                     st.session_state.page = "🔍 Find Flights"
                     st.rerun()
             
             if submit:
-                if all([first_name, last_name, email, phone]):
+                if not all([first_name, last_name, email, phone]):
+                    st.error("Please fill in all required fields")
+                elif not seats.confirm(st.session_state.pop('seat_hold')['id'], key, capacity):
+                    st.error("Sorry, your seat hold expired and the flight has sold out.")
+                else:
                     # Create booking record
                     booking = {
-                        'booking_id': f'BK{random.randint(100000, 999999)}',
+                        'booking_id': new_id('BK'),
                         'flight': flight,
                         'passenger': {
                             'first_name': first_name,
@@ -409,41 +542,65 @@ def booking_form():
                         'status': 'Confirmed'
                     }
                     
-                    st.session_state.bookings.append(booking)
+                    booking_store().add(booking)
+                    st.session_state.booking_ids.append(booking['booking_id'])
+                    notify('confirmation', booking)
+                    schedule_reminder(booking)
                     st.session_state.user_info = booking['passenger']
                     
-                    # Show confirmation
-                    st.balloons()
-                    st.success("🎉 Booking Confirmed!")
-                    
-                    st.markdown(f"""
-                    <div class="card booking-confirmed">
-                        <h3>Booking Confirmation: {booking['booking_id']}</h3>
-                        <p>An email confirmation has been sent to {email}</p>
-                        <p>You can view your booking in the "My Bookings" section</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Add delay before redirecting
-                    import time
-                    time.sleep(3)
+                    # Redirect straight away; My Bookings shows the
+                    # confirmation on its next run
+                    st.session_state.confirmation = {'booking_id': booking['booking_id'],
+                                                     'email': email}
                     st.session_state.page = "📋 My Bookings"
                     st.rerun()
-                else:
-                    st.error("Please fill in all required fields")
 
 # My Bookings Page
 def my_bookings():
     st.title("📋 My Bookings")
     
-    if not st.session_state.bookings:
+    # Confirmation handed over by the booking form's redirect, shown once
+    confirmation = st.session_state.pop('confirmation', None)
+    if confirmation:
+        st.balloons()
+        st.success("🎉 Booking Confirmed!")
+        st.markdown(f"""
+        <div class="card booking-confirmed">
+            <h3>Booking Confirmation: {confirmation['booking_id']}</h3>
+            <p>An email confirmation has been sent to {confirmation['email']}</p>
+            <p>You can view your booking below</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Outcome of a cancel click, kept across its rerun
+    cancelled = st.session_state.pop('cancelled', None)
+    if cancelled is True:
+        st.success("Booking cancelled successfully!")
+    elif cancelled is False:
+        st.info("This booking was already cancelled.")
+    
+    # One page of this session's bookings from the booking store, newest
+    # first - looked up by the ids the session made, never by a typed-in
+    # email, so nobody can list or cancel someone else's
+    store = booking_store()
+    booking_ids = st.session_state.booking_ids[::-1]
+    total = len(booking_ids)
+    if not total:
         st.info("You have no bookings yet. Search for flights to get started!")
         if st.button("🔍 Search Flights"):
             st.session_state.page = "🔍 Find Flights"
             st.rerun()
         return
     
-    for booking in st.session_state.bookings:
+    page_count = max(1, -(-total // BOOKINGS_PAGE_SIZE))
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1)
+    with col2:
+        st.caption(f"{total:,} bookings • Page {page} of {page_count:,}")
+    
+    offset = (page - 1) * BOOKINGS_PAGE_SIZE
+    for booking in store.get_many(booking_ids[offset:offset + BOOKINGS_PAGE_SIZE]):
         flight = booking['flight']
         passenger = booking['passenger']
         
@@ -456,7 +613,7 @@ def my_bookings():
                     <div>
                         <h4>{flight['departure_city']} → {flight['arrival_city']}</h4>
                         <p><strong>Booking ID:</strong> {booking['booking_id']}</p>
-                        <p><strong>Status:</strong> <span style="color: green;">{booking['status']}</span></p>
+                        <p><strong>Status:</strong> <span style="color: {STATUS_COLORS.get(booking['status'], 'gray')};">{booking['status']}</span></p>
                     </div>
                     <div style="text-align: right;">
                         <h3 style="color: #3B82F6;">${flight['price']}</h3>
@@ -470,16 +627,22 @@ def my_bookings():
             </div>
             """, unsafe_allow_html=True)
         
-        with col2:
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("✏️ Modify", key=f"modify_{booking['booking_id']}"):
-                    st.info("Modification feature coming soon!")
+        # Only a confirmed booking can still be changed
+        if booking['status'] == 'Confirmed':
             with col2:
-                if st.button("❌ Cancel", key=f"cancel_{booking['booking_id']}"):
-                    booking['status'] = 'Cancelled'
-                    st.success("Booking cancelled successfully!")
-                    st.rerun()
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("✏️ Modify", key=f"modify_{booking['booking_id']}"):
+                        st.info("Modification feature coming soon!")
+                with col2:
+                    if st.button("❌ Cancel", key=f"cancel_{booking['booking_id']}"):
+                        # False if another session cancelled it first
+                        st.session_state.cancelled = store.cancel(booking['booking_id'])
+                        if st.session_state.cancelled:
+                            seat_inventory().cancel(flight_key(flight))
+                            notification_queue().cancel(f"reminder-{booking['booking_id']}")
+                            notify('cancellation', booking)
+                        st.rerun()
         
         st.markdown("---")
 
@@ -487,21 +650,26 @@ def my_bookings():
 def analytics_page():
     st.title("📊 Travel Analytics")
     
-    # Generate analytics data
-    flights_df = generate_flight_data()
+    # Analytics over the shared columnar schedule - counts and histograms
+    # are computed on the columns, only the scatter sample is decoded
+    store = flight_inventory().store()
+    prices = store.raw('price')
+    arrivals = pd.Series(np.bincount(store.raw('arrival_city'),
+                                     minlength=len(store.labels('arrival_city'))),
+                         index=store.labels('arrival_city'))
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        avg_price = flights_df['price'].mean()
+        avg_price = prices.mean() if len(store) else 0.0
         st.metric("Average Flight Price", f"${avg_price:.2f}")
     
     with col2:
-        total_flights = len(flights_df)
-        st.metric("Available Flights", total_flights)
+        total_flights = len(store)
+        st.metric("Available Flights", f"{total_flights:,}")
     
     with col3:
-        popular_dest = flights_df['arrival_city'].mode()[0]
+        popular_dest = arrivals.idxmax() if len(store) else "-"
         st.metric("Most Popular Destination", popular_dest)
     
     # Charts
@@ -509,22 +677,25 @@ def analytics_page():
     
     with col1:
         # Price distribution
-        fig = px.histogram(flights_df, x='price', nbins=20,
-                          title="Flight Price Distribution",
-                          labels={'price': 'Price ($)'})
+        counts, edges = np.histogram(prices, bins=20)
+        fig = px.bar(x=(edges[:-1] + edges[1:]) / 2, y=counts,
+                    title="Flight Price Distribution",
+                    labels={'x': 'Price ($)', 'y': 'count'})
+        fig.update_layout(bargap=0)
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Popular destinations
-        dest_counts = flights_df['arrival_city'].value_counts().head(10)
+        dest_counts = arrivals.sort_values(ascending=False).head(10)
         fig = px.bar(x=dest_counts.index, y=dest_counts.values,
                     title="Top 10 Destinations",
                     labels={'x': 'City', 'y': 'Number of Flights'})
         st.plotly_chart(fig, use_container_width=True)
     
-    # Flight duration analysis
-    flights_df['duration_hours'] = flights_df['duration'].dt.total_seconds() / 3600
-    
+    # Flight duration analysis on a fixed sample of at most SCATTER_POINTS flights
+    sample = np.random.default_rng(0).choice(len(store), min(len(store), SCATTER_POINTS),
+                                             replace=False)
+    flights_df = store.take(np.sort(sample))
     fig = px.scatter(flights_df, x='duration_hours', y='price',
                     color='class', hover_data=['departure_city', 'arrival_city'],
                     title="Flight Duration vs Price by Class")
@@ -601,7 +772,9 @@ def main():
     page = navigation()
     
     # Page routing
-    if page == "🏠 Home":
+    if page == "booking_form":
+        booking_form()
+    elif page == "🏠 Home":
         home_page()
     elif page == "🔍 Find Flights":
         search_flights()
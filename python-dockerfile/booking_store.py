@@ -0,0 +1,233 @@
+# booking_store.py
+# Usage: python booking_store.py [--bookings 200000] [--frequent 5000]
+#   Fills a scratch database and times the indexed lookups and paging
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from seats import flight_key
+
+BOOKINGS_DB = os.environ.get('BOOKINGS_DB', os.path.join('data', 'bookings.db'))
+
+FLIGHT_FIELDS = ['flight_number', 'airline', 'departure_city', 'arrival_city',
+                 'departure_time', 'arrival_time', 'class', 'aircraft_type', 'price']
+PASSENGER_FIELDS = ['first_name', 'last_name', 'email', 'phone', 'passport', 'dob',
+                    'seat_preference', 'meal_preference']
+DATETIME_FIELDS = {'departure_time', 'arrival_time', 'booking_date'}
+
+# Flights are stored once per flight key and bookings reference them;
+# (email, booking_date) serves a passenger's bookings newest first,
+# flight_number a flight's passenger list and (flight_key, status) the
+# seats sold per flight; flights by departure_time serve the bookings still
+# to depart
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS flights (
+    flight_key TEXT PRIMARY KEY,
+    flight_number TEXT NOT NULL,
+    airline TEXT,
+    departure_city TEXT,
+    arrival_city TEXT,
+    departure_time TEXT,
+    arrival_time TEXT,
+    class TEXT,
+    aircraft_type TEXT,
+    price REAL
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    booking_id TEXT PRIMARY KEY,
+    flight_key TEXT NOT NULL REFERENCES flights (flight_key),
+    flight_number TEXT NOT NULL,
+    first_name TEXT,
+    last_name TEXT,
+    email TEXT NOT NULL,
+    phone TEXT,
+    passport TEXT,
+    dob TEXT,
+    seat_preference TEXT,
+    meal_preference TEXT,
+    payment_method TEXT,
+    booking_date TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bookings_by_email ON bookings (email, booking_date);
+CREATE INDEX IF NOT EXISTS bookings_by_flight ON bookings (flight_number);
+CREATE INDEX IF NOT EXISTS bookings_by_flight_key ON bookings (flight_key, status);
+CREATE INDEX IF NOT EXISTS flights_by_departure ON flights (departure_time);
+"""
+
+SELECT = f"""
+SELECT b.booking_id, b.payment_method, b.booking_date, b.status, b.flight_key,
+       {', '.join(f'b.{name}' for name in PASSENGER_FIELDS)},
+       {', '.join(f'f.{name}' for name in FLIGHT_FIELDS)}
+FROM bookings b JOIN flights f ON f.flight_key = b.flight_key
+"""
+
+
+def _column(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'item'):   # numpy scalars
+        return value.item()
+    return value
+
+
+def _booking(row):
+    # A row back in the app's booking dict shape
+    values = {name: (datetime.fromisoformat(row[name]) if name in DATETIME_FIELDS
+                     and row[name] else row[name])
+              for name in row.keys()}
+    return {
+        'booking_id': values['booking_id'],
+        'flight': {name: values[name] for name in FLIGHT_FIELDS},
+        'passenger': {name: values[name] for name in PASSENGER_FIELDS},
+        'payment_method': values['payment_method'],
+        'booking_date': values['booking_date'],
+        'status': values['status'],
+    }
+
+
+# Bookings in a SQLite database in WAL mode, so page reads never wait on a
+# booking being written. Each thread (Streamlit runs sessions on their own
+# threads) gets its own connection.
+class BookingStore:
+    def __init__(self, path=BOOKINGS_DB):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db().executescript(SCHEMA)
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute('PRAGMA foreign_keys=ON')
+            self._local.db = db
+        return db
+
+    def add(self, booking):
+        flight, passenger = booking['flight'], booking['passenger']
+        with self._db() as db:
+            db.execute(f"INSERT OR IGNORE INTO flights (flight_key, {', '.join(FLIGHT_FIELDS)}) "
+                       f"VALUES ({', '.join('?' * (len(FLIGHT_FIELDS) + 1))})",
+                       [flight_key(flight)] + [_column(flight[name]) for name in FLIGHT_FIELDS])
+            db.execute(f"INSERT INTO bookings (booking_id, flight_key, flight_number, "
+                       f"{', '.join(PASSENGER_FIELDS)}, payment_method, booking_date, status) "
+                       f"VALUES ({', '.join('?' * (len(PASSENGER_FIELDS) + 6))})",
+                       [booking['booking_id'], flight_key(flight), flight['flight_number']]
+                       + [_column(passenger.get(name)) for name in PASSENGER_FIELDS]
+                       + [booking['payment_method'], _column(booking['booking_date']),
+                          booking['status']])
+
+    def get(self, booking_id):
+        row = self._db().execute(SELECT + "WHERE b.booking_id = ?", (booking_id,)).fetchone()
+        return row and _booking(row)
+
+    def get_many(self, booking_ids):
+        # Bookings by id, in the order given; unknown ids are skipped
+        rows = self._db().execute(SELECT + f"WHERE b.booking_id IN ({', '.join('?' * len(booking_ids))})",
+                                  list(booking_ids)) if booking_ids else []
+        found = {row['booking_id']: _booking(row) for row in rows}
+        return [found[booking_id] for booking_id in booking_ids if booking_id in found]
+
+    def count(self, email):
+        return self._db().execute("SELECT count(*) FROM bookings WHERE email = ?",
+                                  (email,)).fetchone()[0]
+
+    def page(self, email, limit, offset=0):
+        # A passenger's bookings, newest first
+        rows = self._db().execute(SELECT + "WHERE b.email = ? ORDER BY b.booking_date DESC "
+                                  "LIMIT ? OFFSET ?", (email, limit, offset))
+        return [_booking(row) for row in rows]
+
+    def for_flight(self, flight_number, limit=100):
+        rows = self._db().execute(SELECT + "WHERE b.flight_number = ? LIMIT ?",
+                                  (flight_number, limit))
+        return [_booking(row) for row in rows]
+
+    def sold_seats(self):
+        # Confirmed bookings per flight key, to restore the seat inventory
+        return dict(self._db().execute("SELECT flight_key, count(*) FROM bookings "
+                                       "WHERE status = 'Confirmed' GROUP BY flight_key"))
+
+    def upcoming(self, now):
+        # Confirmed bookings whose flight departs after `now`
+        rows = self._db().execute(SELECT + "WHERE f.departure_time > ? AND b.status = 'Confirmed'",
+                                  (now.isoformat(timespec='seconds'),))
+        return [_booking(row) for row in rows]
+
+    def cancel(self, booking_id):
+        # True only for the call that actually cancelled the booking, so
+        # its seat and emails are handled once even across sessions
+        with self._db() as db:
+            return db.execute("UPDATE bookings SET status = 'Cancelled' "
+                              "WHERE booking_id = ? AND status != 'Cancelled'",
+                              (booking_id,)).rowcount == 1
+
+
+def _timed(label, call, repeat=200):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    print(f"  {label}: {(time.perf_counter() - started) / repeat * 1e6:,.0f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Booking store benchmark")
+    parser.add_argument('--bookings', type=int, default=200_000)
+    parser.add_argument('--frequent', type=int, default=5000,
+                        help="bookings belonging to one frequent flyer")
+    args = parser.parse_args()
+
+    from inventory import generate_flights
+    flights = generate_flights(1000, seed=0).to_dict('records')
+    with tempfile.TemporaryDirectory() as directory:
+        store = BookingStore(os.path.join(directory, 'bookings.db'))
+        rng = random.Random(0)
+        started = time.perf_counter()
+        now = datetime.now()
+        for number in range(args.bookings):
+            email = ('frequent@example.com' if number < args.frequent
+                     else f'passenger{number % 50_000}@example.com')
+            flight = rng.choice(flights)
+            store.add({
+                'booking_id': f'BK{number:09d}',
+                'flight': flight,
+                'passenger': {'first_name': 'Ada', 'last_name': 'Lovelace', 'email': email,
+                              'seat_preference': 'Aisle', 'meal_preference': 'Standard'},
+                'payment_method': 'Credit Card',
+                'booking_date': now - timedelta(minutes=number),
+                'status': 'Confirmed',
+            })
+        print(f"inserted {args.bookings:,} bookings in {time.perf_counter() - started:.1f} s")
+
+        middle = f'BK{args.bookings // 2:09d}'
+        flight_number = flights[0]['flight_number']
+        pages = max(1, args.frequent // 10)
+        _timed("get by booking_id", lambda: store.get(middle))
+        _timed("page of 10 by booking_id",
+               lambda: store.get_many([f'BK{number:09d}' for number in range(0, args.bookings, 997)][:10]))
+        _timed(f"count for a passenger with {args.frequent:,} bookings",
+               lambda: store.count('frequent@example.com'))
+        _timed("first page of 10", lambda: store.page('frequent@example.com', 10))
+        _timed("last page of 10", lambda: store.page('frequent@example.com', 10, (pages - 1) * 10))
+        _timed("bookings on one flight", lambda: store.for_flight(flight_number))
+        _timed("seats sold per flight", store.sold_seats, repeat=5)
+        for label, query, params in [
+                ('booking_id', SELECT + "WHERE b.booking_id = ?", (middle,)),
+                ('email page', SELECT + "WHERE b.email = ? ORDER BY b.booking_date DESC LIMIT 10",
+                 ('frequent@example.com',)),
+                ('flight_number', SELECT + "WHERE b.flight_number = ?", (flight_number,))]:
+            plan = store._db().execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+            print(f"  plan ({label}): " + '; '.join(row[-1] for row in plan))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# connections.py
+import numpy as np
+import pandas as pd
+
+MAX_STOPS = 2
+MIN_CONNECTION = 60 * 60         # seconds between arrival and the next departure
+MAX_LAYOVER = 12 * 60 * 60       # longest wait at a connecting airport
+TIME_SHIFT = 32                  # event keys are city << 32 | epoch seconds
+ITINERARY_COLUMNS = ['legs', 'stops', 'route', 'departure_time', 'arrival_time',
+                     'duration_hours', 'price']
+
+
+def _range_argmin(values, starts, ends):
+    # Position of the smallest value in each non-empty values[starts:ends],
+    # from a sparse table of power-of-two blocks: any range is covered by
+    # two overlapping blocks
+    table = [np.arange(len(values))]
+    width = 1
+    while width * 2 <= len(values):
+        left, right = table[-1][:-width], table[-1][width:]
+        table.append(np.where(values[right] < values[left], right, left))
+        width *= 2
+    level = np.log2(ends - starts).astype('int64')
+    left = np.empty(len(starts), dtype='int64')
+    right = np.empty(len(starts), dtype='int64')
+    for j in np.unique(level):
+        rows = level == j
+        left[rows] = table[j][starts[rows]]
+        right[rows] = table[j][ends[rows] - (1 << j)]
+    return np.where(values[right] < values[left], right, left)
+
+
+# Time-expanded view of a FlightStore: every leg is an edge from a
+# (departure city, departure time) event to an (arrival city, arrival time)
+# event, and waiting at an airport links its events in time order. Legs are
+# kept grouped by route and sorted by departure time, so "departures from X
+# to Y between t1 and t2" for many (X, t1, t2) windows at once is one
+# vectorized binary search.
+class ConnectionGraph:
+    def __init__(self, store):
+        self.store = store
+        cities = store.labels('departure_city')
+        self.cities = len(cities)
+        # Arrival cities are re-coded as departure city codes; legs into a
+        # city nothing departs from get -1 and are never connected through
+        departure_code = {city: code for code, city in enumerate(cities)}
+        recode = np.array([departure_code.get(city, -1) for city in store.labels('arrival_city')],
+                          dtype='int64')
+        self.departure_city = np.asarray(store.raw('departure_city')).astype('int64')
+        self.arrival_city = recode[store.raw('arrival_city')]
+        self.departure_time = np.asarray(store.raw('departure_time'))
+        self.arrival_time = np.asarray(store.raw('arrival_time'))
+        self.price = np.asarray(store.raw('price'))
+        route = self.departure_city * self.cities + self.arrival_city
+        valid = np.flatnonzero(self.arrival_city >= 0)
+        self.order = valid[np.lexsort((self.departure_time[valid], route[valid]))]
+        self.keys = (route[self.order] << TIME_SHIFT) | self.departure_time[self.order]
+
+    def city_code(self, city):
+        codes = self.store.codes('departure_city', [city])
+        return int(codes[0]) if len(codes) else -1
+
+    def _departures(self, airports, earliest, latest, targets):
+        # Legs from airports[i] to any of `targets` departing in
+        # [earliest[i], latest[i]]
+        route = np.repeat(airports, len(targets)) * self.cities + np.tile(targets, len(airports))
+        starts = np.searchsorted(self.keys, (route << TIME_SHIFT) | np.repeat(earliest, len(targets)))
+        ends = np.searchsorted(self.keys, (route << TIME_SHIFT) | np.repeat(latest, len(targets)),
+                               'right')
+        counts = ends - starts
+        step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return self.order[np.repeat(starts, counts) + step]
+
+    def search(self, origin, destination, depart_from, depart_until, max_stops=1,
+               rank='price', k=10, min_connection=MIN_CONNECTION, max_layover=MAX_LAYOVER):
+        # Up to k itineraries from origin to destination whose first leg
+        # departs in [depart_from, depart_until] (epoch seconds), with at
+        # most max_stops connections, ranked by total price or total
+        # duration - the best itinerary for each final leg and number of
+        # stops.
+        #
+        # Round r labels every leg reachable with exactly r connections with
+        # its best score: the cheapest total price or, by duration, the
+        # latest first departure. A leg departing X at t can follow any leg
+        # that arrived at X in [t - max_layover, t - min_connection], so its
+        # best predecessor is a range minimum over that round's arrivals at
+        # X sorted by time.
+        origin, destination = self.city_code(origin), self.city_code(destination)
+        if origin < 0 or destination < 0 or origin == destination:
+            return pd.DataFrame(columns=ITINERARY_COLUMNS)
+        everywhere = np.array([city for city in range(self.cities) if city != origin])
+        only_destination = np.array([destination])
+
+        legs = self._departures(np.array([origin]), np.array([depart_from]),
+                                np.array([depart_until]),
+                                everywhere if max_stops else only_destination)
+        score = self.price[legs] if rank == 'price' else -self.departure_time[legs]
+        rounds = [(legs, score, None)]
+        for stops in range(1, max_stops + 1):
+            legs, score, _ = rounds[-1]
+            # This round's arrivals at connecting airports that can still
+            # beat the k-th best itinerary found so far (extending one only
+            # adds price and time), sorted by (airport, arrival time)
+            through = self.arrival_city[legs] != destination
+            bound = self._kth_best(rounds, destination, rank, k)
+            if rank == 'price':
+                through &= score < bound
+            else:
+                through &= self.arrival_time[legs] + min_connection + score < bound
+            frontier = np.flatnonzero(through)
+            if not len(frontier):
+                break
+            events = (self.arrival_city[legs[frontier]] << TIME_SHIFT) | self.arrival_time[legs[frontier]]
+            by_event = np.argsort(events, kind='stable')
+            frontier, events = frontier[by_event], events[by_event]
+            airports, first = np.unique(events >> TIME_SHIFT, return_index=True)
+            last = np.r_[first[1:], len(events)] - 1
+            times = events & ((1 << TIME_SHIFT) - 1)
+            following = self._departures(airports, times[first] + min_connection,
+                                         times[last] + max_layover,
+                                         everywhere if stops < max_stops else only_destination)
+            # Even after the best connecting arrival, some legs can't beat it
+            if rank == 'price':
+                following = following[self.price[following] + score[frontier].min() < bound]
+            else:
+                following = following[self.arrival_time[following] + score[frontier].min() < bound]
+
+            here = self.departure_city[following] << TIME_SHIFT
+            departure = self.departure_time[following]
+            starts = np.searchsorted(events, here | (departure - max_layover))
+            ends = np.searchsorted(events, here | (departure - min_connection), 'right')
+            connected = ends > starts
+            if not connected.any():
+                break
+            following, starts, ends = following[connected], starts[connected], ends[connected]
+            previous = frontier[_range_argmin(score[frontier], starts, ends)]
+            if rank == 'price':
+                rounds.append((following, score[previous] + self.price[following], previous))
+            else:
+                rounds.append((following, score[previous], previous))
+        return self._itineraries(rounds, destination, rank, k)
+
+    def _kth_best(self, rounds, destination, rank, k):
+        totals = []
+        for legs, score, _ in rounds:
+            arrived = self.arrival_city[legs] == destination
+            totals.append(score[arrived] if rank == 'price'
+                          else self.arrival_time[legs[arrived]] + score[arrived])
+        totals = np.concatenate(totals)
+        return np.partition(totals, k - 1)[k - 1] if len(totals) >= k else np.inf
+
+    def _itineraries(self, rounds, destination, rank, k):
+        # Rank the legs reaching the destination across all rounds, then
+        # walk only the top k back through their predecessors
+        ends = [np.flatnonzero(self.arrival_city[legs] == destination) for legs, _, _ in rounds]
+        stops = np.concatenate([np.full(len(found), r) for r, found in enumerate(ends)])
+        if not len(stops):
+            return pd.DataFrame(columns=ITINERARY_COLUMNS)
+        index = np.concatenate(ends)
+        final = np.concatenate([rounds[r][0][found] for r, found in enumerate(ends)])
+        score = np.concatenate([rounds[r][1][found] for r, found in enumerate(ends)])
+        arrival = self.arrival_time[final]
+        if rank == 'price':
+            order = np.lexsort((stops, arrival, score))
+        else:
+            order = np.lexsort((stops, arrival + score))
+
+        itineraries = []
+        for i in order[:k]:
+            at, path = index[i], []
+            for legs, _, previous in reversed(rounds[:stops[i] + 1]):
+                path.append(int(legs[at]))
+                if previous is not None:
+                    at = previous[at]
+            itineraries.append(path[::-1])
+
+        departure_cities = self.store.labels('departure_city')
+        arrival_cities = self.store.labels('arrival_city')
+        departure = np.array([self.departure_time[path[0]] for path in itineraries])
+        arrival = np.array([self.arrival_time[path[-1]] for path in itineraries])
+        return pd.DataFrame({
+            'legs': itineraries,
+            'stops': [len(path) - 1 for path in itineraries],
+            'route': [' → '.join([departure_cities[self.departure_city[path[0]]]]
+                                 + [arrival_cities[self.store.raw('arrival_city')[leg]]
+                                    for leg in path])
+                      for path in itineraries],
+            'departure_time': departure.astype('datetime64[s]'),
+            'arrival_time': arrival.astype('datetime64[s]'),
+            'duration_hours': (arrival - departure) / 3600,
+            'price': [round(float(self.price[path].sum()), 2) for path in itineraries],
+        }, columns=ITINERARY_COLUMNS)
@@ -0,0 +1,150 @@
+# flight_index.py
+import os
+
+import numpy as np
+
+DIMENSIONS = ['departure_city', 'arrival_city', 'airline', 'class']
+SORT_KEYS = ['price', 'duration', 'departure_time']
+PRICE_SHIFT = 32   # price keys are group rank << 32 | price in cents
+
+
+def _sort_values(store, key, positions):
+    if key == 'duration':
+        return store.raw('arrival_time')[positions] - store.raw('departure_time')[positions]
+    return store.raw(key)[positions]
+
+
+def _cents(dollars, rounding):
+    return int(rounding(round(dollars * 100, 6)))
+
+
+# Search index over a FlightStore. Flights are grouped by their
+# (departure city, arrival city, airline, class) combination - a hash index
+# on all four filters at once, stored as one CSR layout of the non-empty
+# groups. For each sort key there is a permutation that lists every group's
+# flights contiguously, presorted by that key. An equality filter on any
+# dimension (or none) selects a set of groups; the top K flights in a sort
+# order are the K smallest heads of those presorted runs, and a price range
+# is two binary searches per group. Query time depends on K and the number
+# of groups, not on the number of flights.
+class FlightIndex:
+    ARRAYS = ['groups', 'offsets', 'price_keys'] + [f'by_{key}' for key in SORT_KEYS]
+
+    def __init__(self, store, arrays):
+        self.store = store
+        self._arrays = arrays
+        # Each group's code per dimension, for filtering groups
+        sizes = [len(store.labels(name)) for name in DIMENSIONS]
+        groups = arrays['groups']
+        self._components = {}
+        for name, size in zip(reversed(DIMENSIONS), reversed(sizes)):
+            self._components[name] = groups % size
+            groups = groups // size
+
+    @classmethod
+    def build(cls, store):
+        group = np.zeros(len(store), dtype='int64')
+        for name in DIMENSIONS:
+            group = group * len(store.labels(name)) + store.raw(name)
+        groups, rank = np.unique(group, return_inverse=True)
+        offsets = np.zeros(len(groups) + 1, dtype='int64')
+        np.cumsum(np.bincount(rank, minlength=len(groups)), out=offsets[1:])
+        positions = np.arange(len(store))
+        arrays = {'groups': groups, 'offsets': offsets}
+        cents = np.round(store.raw('price') * 100).astype('int64')
+        for key in SORT_KEYS:
+            values = cents if key == 'price' else _sort_values(store, key, positions)
+            # lexsort is stable, so ties keep position order
+            arrays[f'by_{key}'] = np.lexsort((values, rank)).astype('int32')
+        arrays['price_keys'] = ((rank << PRICE_SHIFT) | cents)[arrays['by_price']]
+        return cls(store, arrays)
+
+    @classmethod
+    def open(cls, store, directory):
+        return cls(store, {name: np.load(os.path.join(directory, f'index.{name}.npy'),
+                                          mmap_mode='r')
+                           for name in cls.ARRAYS})
+
+    def save(self, directory):
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f'index.{name}.npy'), self._arrays[name])
+
+    def _selected_groups(self, filters):
+        # None or an empty list leaves a column unfiltered, as the app's
+        # original `if airline:` filter did - no airlines picked means any
+        selected = np.ones(len(self._arrays['groups']), dtype=bool)
+        for name, values in filters.items():
+            if values:
+                selected &= np.isin(self._components[name], self.store.codes(name, values))
+        return np.flatnonzero(selected)
+
+    def search(self, departure=None, arrival=None, airlines=None, flight_class=None,
+               price_range=None, by='price', descending=False, k=20, offset=0):
+        # (number of matching flights, positions of matches offset..offset+k
+        # in the requested order)
+        ranks = self._selected_groups({
+            'departure_city': departure and [departure],
+            'arrival_city': arrival and [arrival],
+            'airline': airlines,
+            'class': flight_class and [flight_class],
+        })
+        offsets = self._arrays['offsets']
+        starts, ends = offsets[ranks], offsets[ranks + 1]
+
+        price_starts, price_ends = starts, ends
+        if price_range is not None:
+            # Each group's price range by binary search in the price order
+            lo, hi = _cents(price_range[0], np.ceil), _cents(price_range[1], np.floor)
+            price_keys = self._arrays['price_keys']
+            price_starts = np.searchsorted(price_keys, (ranks << PRICE_SHIFT) | lo, 'left')
+            price_ends = np.searchsorted(price_keys, (ranks << PRICE_SHIFT) | hi, 'right')
+            price_ends = np.maximum(price_ends, price_starts)
+        total = int((price_ends - price_starts).sum())
+
+        need = min(offset + k, total)
+        if need <= offset:
+            return total, np.empty(0, dtype='int64')
+        if by == 'price':
+            top = self._top(by, starts=price_starts, ends=price_ends,
+                            descending=descending, need=need)
+        else:
+            top = self._top(by, starts, ends, descending, need, price_range)
+        return total, top[offset:need]
+
+    def _top(self, by, starts, ends, descending, need, price_range=None):
+        # Merge the first `heads` flights of every run (the last ones when
+        # descending), doubling `heads` until `need` flights are certain.
+        # A truncated run may still hold smaller flights than the merged
+        # ones, so only those ordered before every truncated run's last
+        # examined flight are final. Starting from need / runs keeps the
+        # work proportional to `need` even with thousands of runs.
+        order = self._arrays[f'by_{by}']
+        lengths = ends - starts
+        heads = max(1, -(-need // max(len(lengths), 1)))
+        while True:
+            take = np.minimum(lengths, heads)
+            run = np.repeat(np.arange(len(take)), take)
+            step = np.arange(take.sum()) - np.repeat(np.cumsum(take) - take, take)
+            index = ends[run] - 1 - step if descending else starts[run] + step
+            positions = np.asarray(order[index]).astype('int64')
+            values = _sort_values(self.store, by, positions)
+            sign = -1 if descending else 1
+            primary, secondary = sign * values, sign * positions
+
+            truncated = take < lengths
+            last = np.cumsum(take)[truncated] - 1
+            if len(last):
+                frontier = np.lexsort((secondary[last], primary[last]))[0]
+                frontier = (primary[last][frontier], secondary[last][frontier])
+            if price_range is not None:
+                price = self.store.raw('price')[positions]
+                keep = (price >= price_range[0]) & (price <= price_range[1])
+                positions, primary, secondary = positions[keep], primary[keep], secondary[keep]
+            if len(last):
+                final = (primary < frontier[0]) | ((primary == frontier[0])
+                                                   & (secondary <= frontier[1]))
+                positions, primary, secondary = (positions[final], primary[final],
+                                                 secondary[final])
+            if not len(last) or len(positions) >= need:
+                return positions[np.lexsort((secondary, primary))][:need]
+            heads *= 2
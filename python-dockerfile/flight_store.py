@@ -0,0 +1,227 @@
+# flight_store.py
+# Usage: python flight_store.py SCHEDULE [--generate ROWS] [--seed 0]
+#   Builds the columnar cache for a CSV/Parquet schedule ahead of time
+#   (optionally writing a synthetic schedule of ROWS flights first)
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from flight_index import FlightIndex
+
+# String columns are dictionary-encoded: a code per row plus the distinct
+# values, both saved as .npy
+ENCODED = {'flight_number': 'int32', 'airline': 'int16', 'departure_city': 'int16',
+           'arrival_city': 'int16', 'aircraft_type': 'int16', 'class': 'int16'}
+# Times are int64 epoch seconds
+NUMERIC = {'departure_time': 'int64', 'arrival_time': 'int64', 'price': 'float64',
+           'available_seats': 'int32'}
+COLUMNS = list(ENCODED) + list(NUMERIC)
+CHUNK_ROWS = 500_000
+FORMAT_VERSION = 2
+
+
+def _merge_dictionaries(codes, uniques, dtype):
+    # Each chunk is factorized on its own; one factorize over the chunks'
+    # distinct values then maps chunk codes to global ones, so a dictionary
+    # as long as the schedule (flight numbers) never goes through a Python loop
+    if not uniques:
+        return [], np.array([], dtype=str)
+    merged, values = pd.factorize(np.concatenate(uniques), use_na_sentinel=False)
+    merged = merged.astype(dtype)
+    parts, offset = [], 0
+    for chunk_codes, chunk_uniques in zip(codes, uniques):
+        parts.append(merged[offset:offset + len(chunk_uniques)][chunk_codes])
+        offset += len(chunk_uniques)
+    return parts, np.asarray(values, dtype=str)
+
+
+def _is_current(cache_dir, source_stat):
+    try:
+        with open(os.path.join(cache_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return manifest.get('version') == FORMAT_VERSION and manifest.get('source') == source_stat
+
+
+def _epoch_seconds(values):
+    return pd.to_datetime(values).to_numpy('datetime64[s]').astype('int64')
+
+
+def _read_chunks(source):
+    extension = os.path.splitext(source)[1].lower()
+    if extension == '.parquet':
+        for batch in pq.ParquetFile(source).iter_batches(CHUNK_ROWS, columns=COLUMNS):
+            yield batch.to_pandas()
+    elif extension == '.csv':
+        yield from pd.read_csv(source, usecols=COLUMNS, chunksize=CHUNK_ROWS)
+    else:
+        raise ValueError(f"Unsupported schedule file: {source}")
+
+
+# Flight legs as plain numpy columns plus their search index. Opened from
+# disk every column and index array is a read-only memory map, so startup
+# costs a few page faults and every worker process maps the same page-cache
+# pages instead of holding its own copy.
+class FlightStore:
+    def __init__(self, columns, dictionaries, index_directory=None):
+        self._columns = columns
+        self._dictionaries = dictionaries
+        self._codes = {}
+        self.index = (FlightIndex.open(self, index_directory) if index_directory
+                      else FlightIndex.build(self))
+
+    def __len__(self):
+        return len(self._columns['departure_time'])
+
+    @classmethod
+    def from_frame(cls, frame):
+        return cls._encode([frame])
+
+    @classmethod
+    def _encode(cls, chunks):
+        uniques = {name: [] for name in ENCODED}
+        parts = {name: [] for name in COLUMNS}
+        for chunk in chunks:
+            for name, dtype in ENCODED.items():
+                codes, chunk_uniques = pd.factorize(chunk[name], use_na_sentinel=False)
+                parts[name].append(codes.astype(dtype))
+                uniques[name].append(np.asarray(chunk_uniques, dtype=object))
+            for name in ('departure_time', 'arrival_time'):
+                parts[name].append(_epoch_seconds(chunk[name]))
+            for name in ('price', 'available_seats'):
+                parts[name].append(chunk[name].to_numpy(NUMERIC[name]))
+        dictionaries = {}
+        for name, dtype in ENCODED.items():
+            parts[name], dictionaries[name] = _merge_dictionaries(parts[name], uniques[name], dtype)
+        columns = {name: (np.concatenate(parts[name]) if parts[name]
+                          else np.empty(0, dtype=ENCODED.get(name) or NUMERIC[name]))
+                   for name in COLUMNS}
+        return cls(columns, dictionaries)
+
+    @classmethod
+    def open(cls, directory):
+        columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+                   for name in COLUMNS}
+        # Unique-per-flight values like flight numbers make a dictionary as
+        # long as the schedule, so dictionaries are mapped too
+        dictionaries = {name: np.load(os.path.join(directory, f'{name}.values.npy'),
+                                      mmap_mode='r')
+                        for name in ENCODED}
+        return cls(columns, dictionaries, index_directory=directory)
+
+    def save(self, directory, source_stat=None):
+        # Written to a sibling directory of our own and swapped in, so a
+        # reader never maps a half-written column
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(directory) + '.tmp-', dir=parent)
+        os.chmod(tmp_dir, 0o755)
+        try:
+            for name in COLUMNS:
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), self._columns[name])
+            for name, values in self._dictionaries.items():
+                np.save(os.path.join(tmp_dir, f'{name}.values.npy'), values)
+            self.index.save(tmp_dir)
+            with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+                json.dump({'version': FORMAT_VERSION, 'rows': len(self),
+                           'source': source_stat}, f)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        old_dir = tmp_dir + '.old'
+        if os.path.exists(directory):
+            os.rename(directory, old_dir)
+        os.rename(tmp_dir, directory)
+        # Open maps of the old files stay valid after the unlink
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, source, cache_dir=None):
+        # Map the columnar cache of a CSV/Parquet schedule, rebuilding it
+        # first if the source file changed since it was written. Workers
+        # check and map the cache under a shared lock on a file beside it;
+        # a rebuild takes the lock exclusively, so when several workers
+        # start on a new schedule one builds and the rest wait and map it.
+        cache_dir = cache_dir or source + '.columns'
+        stat = os.stat(source)
+        source_stat = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        os.makedirs(os.path.dirname(os.path.abspath(cache_dir)), exist_ok=True)
+        with open(cache_dir + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            if not _is_current(cache_dir, source_stat):
+                # Not an atomic upgrade, so re-check: another worker may
+                # have rebuilt it while we waited
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if not _is_current(cache_dir, source_stat):
+                    cls._encode(_read_chunks(source)).save(cache_dir, source_stat)
+            return cls.open(cache_dir)
+
+    def raw(self, name):
+        return self._columns[name]
+
+    def labels(self, name):
+        return self._dictionaries[name]
+
+    def codes(self, name, values):
+        # Codes of known values; unknown values match nothing. The lookup is
+        # built on first use, so only filtered columns ever get one.
+        if name not in self._codes:
+            self._codes[name] = {value: code for code, value in enumerate(self.labels(name))}
+        return np.array([self._codes[name][value] for value in values
+                         if value in self._codes[name]], dtype=ENCODED[name])
+
+    def take(self, positions):
+        # Decode only the requested rows into the app's flight DataFrame shape
+        departure = np.asarray(self.raw('departure_time')[positions]).astype('datetime64[s]')
+        arrival = np.asarray(self.raw('arrival_time')[positions]).astype('datetime64[s]')
+        frame = pd.DataFrame({
+            name: self.labels(name)[self.raw(name)[positions]] for name in ENCODED
+        })
+        frame['departure_time'] = departure
+        frame['arrival_time'] = arrival
+        frame['duration'] = pd.to_timedelta(arrival - departure)
+        frame['duration_hours'] = (arrival - departure).astype('int64') / 3600
+        frame['price'] = np.asarray(self.raw('price')[positions])
+        frame['available_seats'] = np.asarray(self.raw('available_seats')[positions])
+        return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a flight schedule's columnar cache")
+    parser.add_argument('schedule', help="CSV or Parquet schedule")
+    parser.add_argument('--generate', type=int, metavar='ROWS',
+                        help="write a synthetic schedule of ROWS flights first")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.generate:
+        from inventory import generate_flights
+        started = time.perf_counter()
+        flights = generate_flights(args.generate, args.seed).drop(
+            columns=['duration', 'duration_hours'])
+        if args.schedule.endswith('.parquet'):
+            flights.to_parquet(args.schedule, index=False)
+        else:
+            flights.to_csv(args.schedule, index=False)
+        print(f"wrote {args.generate:,} flights in {time.perf_counter() - started:.1f} s")
+
+    started = time.perf_counter()
+    store = FlightStore.load(args.schedule)
+    print(f"columnar cache ready: {len(store):,} flights in "
+          f"{time.perf_counter() - started:.1f} s")
+    started = time.perf_counter()
+    FlightStore.load(args.schedule)
+    print(f"mapped existing cache in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# ids.py
+# Usage: python ids.py [--count 2000000] [--threads 4] [--processes 4]
+#   Benchmarks ID allocation and checks that IDs from several threads and
+#   processes are unique and ordered by time
+import argparse
+import fcntl
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# 64-bit Snowflake layout: milliseconds since EPOCH_MS, node, sequence
+EPOCH_MS = 1_704_067_200_000      # 2024-01-01 UTC; 41 bits last until 2093
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+NODE = os.environ.get('ID_NODE')  # fixed node number, e.g. one per host
+LOCK_DIR = os.environ.get('ID_LOCK_DIR', os.path.join('data', 'ids'))
+_TIMESTAMP_SHIFT = NODE_BITS + SEQUENCE_BITS
+_SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+# Crockford base32: 13 characters cover 64 bits and sort like the numbers
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+WIDTH = 13
+_SHIFTS = np.arange(WIDTH - 1, -1, -1, dtype='uint64') * 5
+_ALPHABET_BYTES = np.frombuffer(ALPHABET.encode(), dtype='uint8')
+
+
+def encode(value):
+    return ''.join(ALPHABET[(value >> int(shift)) & 31] for shift in _SHIFTS)
+
+
+def encode_many(values):
+    # Vectorized encode() of an int64 array
+    digits = (np.asarray(values, dtype='uint64')[:, None] >> _SHIFTS) & np.uint64(31)
+    return _ALPHABET_BYTES[digits].view(f'S{WIDTH}').ravel().astype(str)
+
+
+def decode(text):
+    value = 0
+    for char in text:
+        value = value * 32 + ALPHABET.index(char)
+    return value
+
+
+def created_at(value):
+    # Epoch milliseconds an ID was allocated at
+    return (value >> _TIMESTAMP_SHIFT) + EPOCH_MS
+
+
+_claimed = []
+
+
+def _claim_node(directory):
+    # Lowest node number whose lock file no live process holds. The lock is
+    # kept for the life of the process and the OS drops it on exit, so a
+    # crashed process frees its node without cleanup.
+    os.makedirs(directory, exist_ok=True)
+    for node in range(1 << NODE_BITS):
+        handle = open(os.path.join(directory, f'node-{node}.lock'), 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            continue
+        _claimed.append(handle)
+        return node
+    raise RuntimeError(f"All {1 << NODE_BITS} ID nodes in {directory} are in use")
+
+
+# Time-ordered 64-bit IDs, unique across processes: each process claims its
+# own node number, and within a process (timestamp << SEQUENCE_BITS |
+# sequence) is one counter that only moves forward - it follows the clock,
+# and when 4096 IDs in a millisecond or a clock step backwards would
+# repeat a value it runs ahead of the clock instead of waiting.
+class IdAllocator:
+    def __init__(self, node=None, lock_dir=LOCK_DIR):
+        if node is None:
+            node = int(NODE) if NODE else _claim_node(lock_dir)
+        if not 0 <= node < 1 << NODE_BITS:
+            raise ValueError(f"ID node must be below {1 << NODE_BITS}: {node}")
+        self.node = node
+        self._node_bits = node << SEQUENCE_BITS
+        self._lock = threading.Lock()
+        self._last = -1
+
+    def _reserve(self, count):
+        now = (time.time_ns() // 1_000_000 - EPOCH_MS) << SEQUENCE_BITS
+        with self._lock:
+            first = max(now, self._last + 1)
+            self._last = first + count - 1
+        return first
+
+    def next_id(self):
+        # The hot path, so _reserve and the bit layout are inlined
+        now = (time.time_ns() // 1_000_000 - EPOCH_MS) << SEQUENCE_BITS
+        with self._lock:
+            counter = self._last = max(now, self._last + 1)
+        return (counter >> SEQUENCE_BITS << _TIMESTAMP_SHIFT) | self._node_bits | (counter & _SEQUENCE_MASK)
+
+    def next_ids(self, count):
+        # `count` consecutive IDs as an int64 array, reserved in one step
+        first = self._reserve(count)
+        counter = np.arange(first, first + count, dtype='int64')
+        return (counter >> SEQUENCE_BITS << _TIMESTAMP_SHIFT) | self._node_bits | (counter & _SEQUENCE_MASK)
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def allocator():
+    # This process's allocator, claiming a node on first use
+    global _allocator
+    with _allocator_lock:
+        if _allocator is None:
+            _allocator = IdAllocator()
+        return _allocator
+
+
+def new_id(prefix=''):
+    return prefix + encode(allocator().next_id())
+
+
+def new_ids(count, prefix=''):
+    return np.char.add(prefix, encode_many(allocator().next_ids(count)))
+
+
+def _allocate(count, lock_dir, results):
+    ids = IdAllocator(lock_dir=lock_dir)
+    results.put(np.array([ids.next_id() for _ in range(count)], dtype='int64'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ID allocator benchmark")
+    parser.add_argument('--count', type=int, default=2_000_000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as lock_dir:
+        ids = IdAllocator(node=0)
+        started = time.perf_counter()
+        single = [ids.next_id() for _ in range(args.count)]
+        elapsed = time.perf_counter() - started
+        print(f"next_id: {args.count / elapsed:,.0f} IDs/s in one thread")
+        assert single == sorted(set(single)), "IDs repeat or go backwards"
+
+        per_thread = args.count // args.threads
+        collected = [[] for _ in range(args.threads)]
+
+        def worker(out):
+            out.extend(ids.next_id() for _ in range(per_thread))
+
+        threads = [threading.Thread(target=worker, args=(out,)) for out in collected]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        merged = [value for out in collected for value in out]
+        print(f"next_id: {len(merged) / elapsed:,.0f} IDs/s across {args.threads} threads, "
+              f"{len(set(merged) | set(single)) - len(single):,} new unique of {len(merged):,}")
+
+        started = time.perf_counter()
+        batch = ids.next_ids(args.count * 5)
+        elapsed = time.perf_counter() - started
+        print(f"next_ids: {len(batch) / elapsed:,.0f} IDs/s in one batch")
+        started = time.perf_counter()
+        encoded = encode_many(batch)
+        elapsed = time.perf_counter() - started
+        print(f"encode_many: {len(batch) / elapsed:,.0f} IDs/s, e.g. {encoded[0]}, "
+              f"sorted as text: {bool((encoded[1:] > encoded[:-1]).all())}")
+        assert decode(encoded[-1]) == batch[-1]
+
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_allocate,
+                                             args=(args.count // args.processes, lock_dir, results))
+                     for _ in range(args.processes)]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        allocated = np.concatenate([results.get() for _ in processes])
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+        nodes = np.unique((allocated >> SEQUENCE_BITS) & ((1 << NODE_BITS) - 1))
+        print(f"{args.processes} processes on nodes {nodes.tolist()}: "
+              f"{len(allocated):,} IDs, {len(np.unique(allocated)):,} unique, {elapsed:.1f} s")
+        assert len(np.unique(allocated)) == len(allocated)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# inventory.py
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from flight_store import FlightStore
+from ids import new_ids
+
+CITIES = ['New York', 'Los Angeles', 'Chicago', 'Miami', 'London', 'Paris',
+          'Tokyo', 'Dubai', 'Sydney', 'Singapore', 'Delhi', 'Frankfurt']
+# (latitude, longitude) of each city's main airport
+CITY_COORDINATES = {
+    'New York': (40.64, -73.78), 'Los Angeles': (33.94, -118.41),
+    'Chicago': (41.98, -87.90), 'Miami': (25.80, -80.29),
+    'London': (51.47, -0.45), 'Paris': (49.01, 2.55),
+    'Tokyo': (35.55, 139.78), 'Dubai': (25.25, 55.36),
+    'Sydney': (-33.94, 151.18), 'Singapore': (1.36, 103.99),
+    'Delhi': (28.56, 77.10), 'Frankfurt': (50.04, 8.56),
+}
+AIRLINES = ['SkyWings Airlines', 'Global Airways', 'Oceanic Airlines', 'Continental Express']
+AIRCRAFT = ['Boeing 737', 'Airbus A320', 'Boeing 787', 'Airbus A350']
+CLASSES = ['Economy', 'Premium Economy', 'Business', 'First']
+
+FLIGHT_COUNT = int(os.environ.get('FLIGHT_COUNT', 50))
+SEED = int(os.environ['FLIGHT_SEED']) if os.environ.get('FLIGHT_SEED') else None
+TTL = float(os.environ.get('FLIGHT_INVENTORY_TTL', 0))   # seconds, 0 = never expire
+SCHEDULE = os.environ.get('FLIGHT_SCHEDULE')   # CSV/Parquet schedule instead of random flights
+
+
+def _categorical(rng, values, count):
+    return pd.Categorical.from_codes(rng.integers(0, len(values), count), categories=values)
+
+
+# Random schedule of `count` flights departing 1-30 days after `now`, with
+# typed columns: categoricals for the string fields, datetime64/timedelta64
+# times and a precomputed duration in hours. Flight numbers come from the
+# ID allocator, so they never collide.
+def generate_flights(count=FLIGHT_COUNT, seed=None, now=None):
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now().replace(minute=0, second=0, microsecond=0)
+    departure = rng.integers(0, len(CITIES), count)
+    # Any city but the departure one
+    arrival = (departure + rng.integers(1, len(CITIES), count)) % len(CITIES)
+    departure_time = (np.datetime64(now, 'm')
+                      + rng.integers(1, 31, count).astype('timedelta64[D]')
+                      + rng.integers(0, 24, count).astype('timedelta64[h]'))
+    duration = rng.integers(1, 13, count).astype('timedelta64[h]')
+    return pd.DataFrame({
+        'flight_number': new_ids(count, 'SW'),
+        'airline': _categorical(rng, AIRLINES, count),
+        'departure_city': pd.Categorical.from_codes(departure, categories=CITIES),
+        'arrival_city': pd.Categorical.from_codes(arrival, categories=CITIES),
+        'departure_time': pd.to_datetime(departure_time),
+        'arrival_time': pd.to_datetime(departure_time + duration),
+        'duration': pd.to_timedelta(duration),
+        'duration_hours': duration.astype('int64').astype('float64'),
+        'price': rng.uniform(150, 1500, count).round(2),
+        'available_seats': rng.integers(5, 201, count),
+        'aircraft_type': _categorical(rng, AIRCRAFT, count),
+        'class': _categorical(rng, CLASSES, count),
+    })
+
+
+# Flight schedule built once and shared by every session in the process:
+# the memory-mapped columnar cache of a schedule file, or random flights.
+# It is rebuilt only by reload() or, with a TTL, on the first read after
+# it expires; a schedule file is re-encoded only if it changed.
+class FlightInventory:
+    def __init__(self, seed=SEED, ttl=TTL, count=FLIGHT_COUNT, schedule=SCHEDULE):
+        self.seed = seed
+        self.ttl = ttl
+        self.count = count
+        self.schedule = schedule
+        self.version = 0
+        self._lock = threading.Lock()
+        self._build()
+
+    def _build(self):
+        if self.schedule:
+            self._store = FlightStore.load(self.schedule)
+        else:
+            self._store = FlightStore.from_frame(generate_flights(self.count, self.seed))
+        self.built_at = time.time()
+        self.version += 1
+
+    def store(self):
+        if self.ttl and time.time() - self.built_at >= self.ttl:
+            with self._lock:
+                if time.time() - self.built_at >= self.ttl:
+                    self._build()
+        return self._store
+
+    def reload(self):
+        with self._lock:
+            self._build()
+        return self._store
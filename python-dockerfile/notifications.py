@@ -0,0 +1,324 @@
+# notifications.py
+# Usage: python notifications.py [--jobs 2000] [--workers 8] [--failure-rate 0.2]
+#   Pushes jobs through the queue into the local SMTP stand-in (failing a
+#   share of deliveries to exercise retries) and prints the queue metrics
+import argparse
+import heapq
+import itertools
+import os
+import random
+import smtplib
+import socket
+import socketserver
+import threading
+import time
+from collections import defaultdict, deque
+from email.message import EmailMessage
+
+SMTP_HOST = os.environ.get('SMTP_HOST')   # unset: deliver to the local SMTP stand-in
+SMTP_PORT = int(os.environ.get('SMTP_PORT', 25))
+SENDER = os.environ.get('NOTIFY_SENDER', 'SkyWings Booking <no-reply@skywings.com>')
+WORKERS = int(os.environ.get('NOTIFY_WORKERS', 4))
+MAX_ATTEMPTS = 4
+RETRY_DELAY = 2.0                 # seconds before the first retry, doubled after each
+REMINDER_LEAD = 24 * 60 * 60      # reminders go out this long before departure
+LATENCY_WINDOW = 1000             # recent jobs per kind kept for latency percentiles
+
+TEMPLATES = {
+    'confirmation': (
+        "Booking confirmed: {booking_id}",
+        "Hi {first_name},\n\nYour booking {booking_id} is confirmed: {flight_number} "
+        "from {departure_city} to {arrival_city}, departing {departure}.\n"),
+    'cancellation': (
+        "Booking cancelled: {booking_id}",
+        "Hi {first_name},\n\nYour booking {booking_id} for {flight_number} from "
+        "{departure_city} to {arrival_city} has been cancelled.\n"),
+    'reminder': (
+        "Your flight to {arrival_city} departs soon",
+        "Hi {first_name},\n\nA reminder that {flight_number} from {departure_city} to "
+        "{arrival_city} departs {departure}. Booking ID: {booking_id}.\n"),
+}
+
+
+def render(kind, to, fields, sender=SENDER):
+    subject, body = TEMPLATES[kind]
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = to
+    message['Subject'] = subject.format(**fields)
+    message.set_content(body.format(**fields))
+    return message
+
+
+# Sends through an SMTP relay, keeping one connection open per worker thread
+class SMTPMailer:
+    def __init__(self, host, port, sender=SENDER, timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+        # smtplib otherwise resolves our FQDN on every connection
+        self.local_hostname = socket.getfqdn()
+        self._local = threading.local()
+
+    def _connection(self):
+        if getattr(self._local, 'smtp', None) is None:
+            self._local.smtp = smtplib.SMTP(self.host, self.port, self.local_hostname,
+                                            timeout=self.timeout)
+        return self._local.smtp
+
+    def _close(self):
+        smtp, self._local.smtp = getattr(self._local, 'smtp', None), None
+        if smtp is not None:
+            try:
+                smtp.close()
+            except OSError:
+                pass
+
+    def send(self, kind, to, fields):
+        message = render(kind, to, fields, self.sender)
+        try:
+            try:
+                self._connection().send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                # The relay dropped an idle connection; reconnect once
+                self._close()
+                self._connection().send_message(message)
+        except (smtplib.SMTPException, OSError):
+            self._close()
+            raise
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        self.reply('220 localhost SMTP stand-in')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = command.partition(':')[2].strip('<> '), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.partition(':')[2].strip('<> '))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line.rstrip(b'\r\n') == b'.':
+                        break
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+                if random.random() < server.failure_rate:
+                    self.reply('451 Temporary failure, try again later')
+                    continue
+                with server.lock:
+                    server.messages.append({'from': sender, 'to': recipients,
+                                            'data': b''.join(lines).decode('utf-8', 'replace')})
+                    server.received += 1
+                self.reply('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+# Minimal SMTP server on localhost that keeps the last messages in memory -
+# a stand-in mail relay for development and tests. failure_rate makes it
+# answer that share of messages with a temporary 451 error.
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, keep=100, failure_rate=0.0):
+        super().__init__(('127.0.0.1', port), _SMTPHandler)
+        self.messages = deque(maxlen=keep)
+        self.received = 0
+        self.failure_rate = failure_rate
+        self.lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True, name='smtp-stand-in').start()
+        return self
+
+    @property
+    def address(self):
+        return self.server_address
+
+
+# In-process job queue with a pool of worker threads. Jobs wait in a heap
+# ordered by when they are due - right away, or later for reminders - so
+# submitting one costs a heap push and the booking request never waits on
+# SMTP. A failed delivery is retried after RETRY_DELAY, doubling each time,
+# and dropped into `dead` after MAX_ATTEMPTS. Cancelled jobs are skipped
+# when they come due.
+class NotificationQueue:
+    def __init__(self, send, workers=WORKERS, max_attempts=MAX_ATTEMPTS, retry_delay=RETRY_DELAY):
+        self._send = send
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.dead = deque(maxlen=100)
+        self._heap = []       # (run at, sequence, job)
+        self._jobs = {}       # job id -> job, while queued
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._counts = dict.fromkeys(['submitted', 'sent', 'retried', 'failed', 'cancelled'], 0)
+        self._latency = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        for number in range(workers):
+            threading.Thread(target=self._work, daemon=True, name=f'notify-{number}').start()
+
+    @classmethod
+    def from_env(cls):
+        # Deliver through SMTP_HOST, or a local stand-in server when unset
+        if SMTP_HOST:
+            queue = cls(SMTPMailer(SMTP_HOST, SMTP_PORT).send)
+            queue.outbox = None
+        else:
+            outbox = LocalSMTPServer().start()
+            queue = cls(SMTPMailer(*outbox.address).send)
+            queue.outbox = outbox
+        return queue
+
+    def submit(self, kind, to, fields, delay=0, job_id=None):
+        # job_id names a job so it can be cancelled later without keeping
+        # the returned id, e.g. a booking's reminder
+        due = time.monotonic() + max(0, delay)
+        with self._condition:
+            job_id = job_id or next(self._ids)
+            self._schedule({'id': job_id, 'kind': kind, 'to': to, 'fields': fields,
+                            'due': due, 'attempts': 0}, due)
+            self._counts['submitted'] += 1
+        return job_id
+
+    def _schedule(self, job, run_at):
+        # Resubmitting a job id replaces the queued job; the old heap entry
+        # is skipped when it surfaces
+        job['run_at'] = run_at
+        self._jobs[job['id']] = job
+        heapq.heappush(self._heap, (run_at, next(self._sequence), job))
+        self._condition.notify()
+
+    def cancel(self, job_id):
+        with self._condition:
+            if self._jobs.pop(job_id, None) is None:
+                return False
+            self._counts['cancelled'] += 1
+            return True
+
+    def _next_job(self):
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                while self._heap and self._jobs.get(self._heap[0][2]['id']) is not self._heap[0][2]:
+                    heapq.heappop(self._heap)
+                if self._heap and self._heap[0][0] <= now:
+                    _, _, job = heapq.heappop(self._heap)
+                    self._in_flight += 1
+                    return self._jobs.pop(job['id'])
+                self._condition.wait(self._heap[0][0] - now if self._heap else None)
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            job['attempts'] += 1
+            try:
+                self._send(job['kind'], job['to'], job['fields'])
+                sent = True
+            except (smtplib.SMTPException, OSError):
+                sent = False
+            with self._condition:
+                self._in_flight -= 1
+                if sent:
+                    self._counts['sent'] += 1
+                    self._latency[job['kind']].append(time.monotonic() - job['due'])
+                elif job['attempts'] < self.max_attempts:
+                    self._counts['retried'] += 1
+                    self._schedule(job, time.monotonic()
+                                   + self.retry_delay * 2 ** (job['attempts'] - 1))
+                else:
+                    self._counts['failed'] += 1
+                    self.dead.append(job)
+                self._condition.notify_all()
+
+    def metrics(self):
+        # Queue depth (due now vs. scheduled for later), jobs being sent,
+        # counters, and latency from when each job was due to its delivery
+        with self._condition:
+            now = time.monotonic()
+            due = sum(1 for job in self._jobs.values() if job['run_at'] <= now)
+            latency = {kind: sorted(values) for kind, values in self._latency.items()}
+            metrics = {'queued': due, 'scheduled': len(self._jobs) - due,
+                       'in_flight': self._in_flight, **self._counts}
+        metrics['latency'] = {
+            kind: {'p50': values[len(values) // 2], 'p95': values[int(len(values) * 0.95)],
+                   'max': values[-1]}
+            for kind, values in latency.items() if values}
+        return metrics
+
+    def join(self, timeout=None):
+        # Wait until no job is due or being sent
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._in_flight or any(job['run_at'] <= time.monotonic()
+                                         for job in self._jobs.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(0.05 if remaining is None else min(remaining, 0.05))
+            return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notification queue load test")
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--failure-rate', type=float, default=0.2)
+    args = parser.parse_args()
+
+    outbox = LocalSMTPServer(keep=args.jobs, failure_rate=args.failure_rate).start()
+    queue = NotificationQueue(SMTPMailer(*outbox.address).send, workers=args.workers,
+                              retry_delay=0.01)
+    fields = {'booking_id': 'BK000000', 'first_name': 'Ada', 'flight_number': 'SW1000',
+              'departure_city': 'London', 'arrival_city': 'Tokyo', 'departure': 'Jan 01 08:00'}
+    started = time.perf_counter()
+    submit_times = []
+    for number in range(args.jobs):
+        kind = ['confirmation', 'cancellation', 'reminder'][number % 3]
+        submitted = time.perf_counter()
+        queue.submit(kind, f'passenger{number}@example.com', fields,
+                     delay=0.2 if kind == 'reminder' else 0)
+        submit_times.append(time.perf_counter() - submitted)
+    while sum(queue.metrics()[name] for name in ('sent', 'failed')) < args.jobs:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    metrics = queue.metrics()
+    submit_times.sort()
+    print(f"{args.jobs:,} jobs, {args.workers} workers, {args.failure_rate:.0%} SMTP failures: "
+          f"{elapsed:.2f} s ({metrics['sent'] / elapsed:,.0f} emails/s)")
+    print(f"  submit p50 {submit_times[len(submit_times) // 2] * 1e6:.1f} us, "
+          f"max {submit_times[-1] * 1e6:.1f} us")
+    print(f"  sent {metrics['sent']:,}, retried {metrics['retried']:,}, failed {metrics['failed']:,}, "
+          f"received by SMTP {outbox.received:,}")
+    for kind, latency in metrics['latency'].items():
+        print(f"  {kind} latency p50 {latency['p50'] * 1000:.1f} ms, "
+              f"p95 {latency['p95'] * 1000:.1f} ms, max {latency['max'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# seats.py
+# Usage: python seats.py [--threads 32] [--seats 150] [--seconds 5] [--hold-ttl 0.05]
+#   Load test: many threads booking, cancelling and abandoning holds on one
+#   flight, checking that it is never oversold
+import argparse
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+HOLD_TTL = float(os.environ.get('SEAT_HOLD_TTL', 10 * 60))   # seconds a seat is held
+
+
+# Key identifying a flight across schedule reloads
+def flight_key(flight):
+    return f"{flight['flight_number']}@{flight['departure_time']:%Y-%m-%dT%H:%M}"
+
+
+# Seats sold and held per flight, shared by every session in the process.
+# A flight's capacity is the schedule's available_seats; every check-and-
+# update happens under one lock, so two sessions can never both take the
+# last seat. Holds reserve seats while a passenger fills in the booking
+# form and lapse after their TTL - expired holds are evicted from a heap
+# ordered by expiry on every call, so abandoned forms give their seats back
+# without a sweeper thread. `sold` seeds seats already sold per flight key,
+# e.g. from the booking store on start-up.
+class SeatInventory:
+    def __init__(self, hold_ttl=HOLD_TTL, sold=None):
+        self.hold_ttl = hold_ttl
+        self._lock = threading.Lock()
+        self._sold = defaultdict(int, sold or {})
+        self._held = defaultdict(int)
+        self._holds = {}      # hold id -> (flight key, seats, expires)
+        self._expiry = []     # heap of (expires, hold id)
+        self._ids = itertools.count(1)
+
+    def _evict(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, hold_id = heapq.heappop(self._expiry)
+            hold = self._holds.get(hold_id)
+            if hold and hold[2] <= now:
+                self._drop(hold_id)
+
+    def _drop(self, hold_id):
+        key, seats, _ = self._holds.pop(hold_id)
+        self._held[key] -= seats
+        if not self._held[key]:
+            del self._held[key]
+
+    def _free(self, key, capacity):
+        return capacity - self._sold[key] - self._held[key]
+
+    def available(self, key, capacity):
+        with self._lock:
+            self._evict(time.monotonic())
+            return max(0, self._free(key, capacity))
+
+    def hold(self, key, capacity, seats=1, ttl=None):
+        # Hold id, or None if fewer than `seats` are free
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            if self._free(key, capacity) < seats:
+                return None
+            hold_id = next(self._ids)
+            expires = now + (self.hold_ttl if ttl is None else ttl)
+            self._holds[hold_id] = (key, seats, expires)
+            self._held[key] += seats
+            heapq.heappush(self._expiry, (expires, hold_id))
+            return hold_id
+
+    def confirm(self, hold_id, key, capacity, seats=1):
+        # Turn a hold into sold seats. A hold that already lapsed is retaken
+        # if the seats are still free; False means they are gone.
+        with self._lock:
+            self._evict(time.monotonic())
+            if hold_id in self._holds:
+                key, seats, _ = self._holds[hold_id]
+                self._drop(hold_id)
+            elif self._free(key, capacity) < seats:
+                return False
+            self._sold[key] += seats
+            return True
+
+    def release(self, hold_id):
+        with self._lock:
+            if hold_id in self._holds:
+                self._drop(hold_id)
+
+    def book(self, key, capacity, seats=1):
+        # Atomic check-and-decrement without a hold
+        with self._lock:
+            self._evict(time.monotonic())
+            if self._free(key, capacity) < seats:
+                return False
+            self._sold[key] += seats
+            return True
+
+    def cancel(self, key, seats=1):
+        with self._lock:
+            self._sold[key] = max(0, self._sold[key] - seats)
+
+    def counts(self, key):
+        with self._lock:
+            self._evict(time.monotonic())
+            return self._sold[key], self._held[key]
+
+
+def load_test(threads, capacity, seconds, hold_ttl):
+    inventory = SeatInventory(hold_ttl)
+    key = 'SW1000@2030-01-01T08:00'
+    # Every thread waits on `go` until all have started: a thread already
+    # spinning on hold() could otherwise starve the main thread of the GIL
+    # before it starts the rest
+    go = threading.Event()
+    stop = threading.Event()
+    totals = defaultdict(int)
+    oversold = []
+    totals_lock = threading.Lock()
+
+    def passenger(seed):
+        rng = random.Random(seed)
+        counts = defaultdict(int)
+        booked = 0
+        go.wait()
+        while not stop.is_set():
+            hold_id = inventory.hold(key, capacity)
+            counts['attempts'] += 1
+            if hold_id is None:
+                # Sold out: sometimes cancel one of ours to keep seats moving
+                if booked and rng.random() < 0.5:
+                    inventory.cancel(key)
+                    booked -= 1
+                    counts['cancelled'] += 1
+                counts['sold out'] += 1
+                continue
+            choice = rng.random()
+            if choice < 0.6:
+                if inventory.confirm(hold_id, key, capacity):
+                    booked += 1
+                    counts['booked'] += 1
+            elif choice < 0.8:
+                inventory.release(hold_id)
+                counts['released'] += 1
+            else:
+                counts['abandoned'] += 1   # left to expire
+        with totals_lock:
+            for name, value in counts.items():
+                totals[name] += value
+            totals['still booked'] += booked
+
+    def auditor():
+        go.wait()
+        while not stop.is_set():
+            sold, held = inventory.counts(key)
+            if sold + held > capacity:
+                oversold.append((sold, held))
+            time.sleep(0.001)
+
+    workers = [threading.Thread(target=passenger, args=(seed,)) for seed in range(threads)]
+    workers.append(threading.Thread(target=auditor))
+    for worker in workers:
+        worker.start()
+    started = time.perf_counter()
+    go.set()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    sold, held = inventory.counts(key)
+    print(f"{threads} threads, {capacity} seats, {elapsed:.1f} s")
+    print(f"  {totals['attempts']:,} hold attempts ({totals['attempts'] / elapsed:,.0f}/s), "
+          f"{totals['booked']:,} bookings, {totals['cancelled']:,} cancellations, "
+          f"{totals['released']:,} released, {totals['abandoned']:,} abandoned holds, "
+          f"{totals['sold out']:,} sold out")
+    print(f"  seats sold {sold} = bookings held by passengers {totals['still booked']}, "
+          f"capacity {capacity}, oversold snapshots {len(oversold)}")
+    return sold == totals['still booked'] and sold <= capacity and not oversold
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seat inventory load test")
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--seats', type=int, default=150)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--hold-ttl', type=float, default=0.05)
+    args = parser.parse_args()
+    if not load_test(args.threads, args.seats, args.seconds, args.hold_ttl):
+        raise SystemExit("oversold")
+    print("  no oversells")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# aggregates.py
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+# Running totals kept up to date on every append, so the metrics and
+# summary charts never have to scan the transaction history. Totals are
+# integer cents, so they stay exact however many rows are summed; the
+# properties and DataFrame views convert to dollars.
+class AggregateEngine:
+    def __init__(self):
+        self.by_type = defaultdict(int)
+        self.by_category = defaultdict(int)        # (type, category)
+        self.by_payment_method = defaultdict(int)
+        self.by_day = defaultdict(int)             # (type, datetime64[D])
+        self.by_month = defaultdict(int)           # (datetime64[M], type)
+        self.by_month_category = defaultdict(int)  # (datetime64[M], type, category)
+
+    def add(self, day, type_, category, cents, payment_method):
+        day = np.datetime64(day, 'D')
+        self.by_type[type_] += cents
+        self.by_category[(type_, category)] += cents
+        self.by_payment_method[payment_method] += cents
+        self.by_day[(type_, day)] += cents
+        month = day.astype('datetime64[M]')
+        self.by_month[(month, type_)] += cents
+        self.by_month_category[(month, type_, category)] += cents
+
+    def add_columns(self, day, type_, category, cents, payment_method):
+        # Bulk variant of add() for column arrays (day numbers, cents and
+        # Categoricals) - one groupby over integer keys per aggregate
+        day = np.asarray(day).astype('int64')
+        df = pd.DataFrame({
+            'day': day,
+            'month': day.astype('datetime64[D]').astype('datetime64[M]').astype('int64'),
+            'type': type_,
+            'category': category,
+            'cents': cents,
+            'payment_method': payment_method,
+        })
+
+        def sums(keys):
+            return df.groupby(keys, observed=True, sort=False)['cents'].sum().items()
+
+        for key, value in sums('type'):
+            self.by_type[key] += int(value)
+        for key, value in sums(['type', 'category']):
+            self.by_category[key] += int(value)
+        for key, value in sums('payment_method'):
+            self.by_payment_method[key] += int(value)
+        for (t, d), value in sums(['type', 'day']):
+            self.by_day[(t, np.datetime64(d, 'D'))] += int(value)
+        for (m, t), value in sums(['month', 'type']):
+            self.by_month[(np.datetime64(m, 'M'), t)] += int(value)
+        for (m, t, c), value in sums(['month', 'type', 'category']):
+            self.by_month_category[(np.datetime64(m, 'M'), t, c)] += int(value)
+
+    @property
+    def total_income(self):
+        return self.by_type['Income'] / 100
+
+    @property
+    def total_expense(self):
+        return self.by_type['Expense'] / 100
+
+    @property
+    def balance(self):
+        return (self.by_type['Income'] - self.by_type['Expense']) / 100
+
+    # DataFrame views below mirror the groupby(...).sum().reset_index() shapes.
+    # Dicts are copied with list() first since other sessions may be appending.
+    def type_totals(self):
+        return pd.DataFrame(sorted((t, v / 100) for t, v in list(self.by_type.items()) if v),
+                            columns=['type', 'amount'])
+
+    def category_totals(self, type_):
+        rows = sorted((c, v / 100) for (t, c), v in list(self.by_category.items()) if t == type_)
+        return pd.DataFrame(rows, columns=['category', 'amount'])
+
+    def payment_method_totals(self):
+        rows = sorted((p, v / 100) for p, v in list(self.by_payment_method.items()))
+        return pd.DataFrame(rows, columns=['payment_method', 'amount'])
+
+    def daily_totals(self, type_):
+        rows = sorted((d, v / 100) for (t, d), v in list(self.by_day.items()) if t == type_)
+        df = pd.DataFrame(rows, columns=['date', 'amount'])
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def monthly_totals(self):
+        rows = sorted((str(m), t, v / 100) for (m, t), v in list(self.by_month.items()))
+        return pd.DataFrame(rows, columns=['month', 'type', 'amount'])
@@ -0,0 +1,326 @@
+# benchmarks.py
+# Usage: python benchmarks.py [--rows 1000000] [--seed 0]
+#        python benchmarks.py --only pages [--page-rows 10000 100000 1000000]
+#                             [--output results.jsonl] [--baseline previous.jsonl]
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from importer import (EXPENSE_CATEGORIES, INCOME_CATEGORIES, PAYMENT_METHODS,
+                      import_statement)
+from persistence import TransactionLog
+from transaction_store import TransactionStore
+
+
+# Deterministic synthetic transactions shaped like add_transaction() output
+def synthetic_transactions(rows, seed=0, start='2020-01-01', days=4 * 365):
+    rng = np.random.default_rng(seed)
+    is_income = rng.random(rows) < 0.15
+    date = np.datetime64(start, 'D') + rng.integers(0, days, rows)
+    category = np.where(
+        is_income,
+        np.array(INCOME_CATEGORIES, dtype=object)[rng.integers(0, len(INCOME_CATEGORIES), rows)],
+        np.array(EXPENSE_CATEGORIES, dtype=object)[rng.integers(0, len(EXPENSE_CATEGORIES), rows)],
+    )
+    amount = np.where(is_income, rng.uniform(500, 5000, rows), rng.uniform(1, 300, rows))
+    return pd.DataFrame({
+        'date': date,
+        'type': np.where(is_income, 'Income', 'Expense').astype(object),
+        'category': category,
+        'amount': amount.round(2),
+        'description': '',
+        'payment_method': np.array(PAYMENT_METHODS, dtype=object)[
+            rng.integers(0, len(PAYMENT_METHODS), rows)],
+        'timestamp': date.astype('datetime64[us]'),
+    })
+
+
+# Monthly salary and rent ending at `end`, so the forecast has series to find
+def recurring_transactions(end, months=48):
+    month_starts = np.datetime64(end, 'M') - np.arange(months)[::-1]
+    dates = np.concatenate([month_starts.astype('datetime64[D]'),
+                            month_starts.astype('datetime64[D]') + 2])
+    return pd.DataFrame({
+        'date': dates,
+        'type': ['Income'] * months + ['Expense'] * months,
+        'category': ['Salary'] * months + ['Bills'] * months,
+        'amount': [4200.0] * months + [1450.0] * months,
+        'description': ['Payroll'] * months + ['Rent'] * months,
+        'payment_method': 'Bank Transfer',
+        'timestamp': dates.astype('datetime64[us]'),
+    })
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def bench_persistence(rows, seed):
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = TransactionStore()
+        store.extend(synthetic_transactions(rows, seed))
+        log = TransactionLog(data_dir)
+        _, compact_time = _timed(log.compact, store)
+
+        transaction = {'date': '2024-01-15', 'type': 'Expense', 'category': 'Food',
+                       'amount': 12.5, 'description': '', 'payment_method': 'Cash',
+                       'timestamp': datetime.now().isoformat()}
+        appends = 100
+        _, append_time = _timed(lambda: [log.append(store, transaction)
+                                         for _ in range(appends)])
+
+        cold = TransactionStore()
+        _, load_time = _timed(TransactionLog(data_dir).load, cold)
+        assert len(cold) == rows + appends
+
+    print(f"persistence @ {rows:,} rows")
+    print(f"  compact to snapshot: {compact_time:8.3f} s")
+    print(f"  append (WAL+fsync):  {append_time / appends * 1000:8.3f} ms/txn")
+    print(f"  cold-start load:     {load_time:8.3f} s")
+
+
+def bench_import(rows, seed):
+    statement = synthetic_transactions(rows, seed)
+    statement['amount'] = statement['amount'].where(statement['type'] == 'Income',
+                                                    -statement['amount'])
+    csv = statement.drop(columns=['type', 'timestamp']).to_csv(index=False).encode()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        store, log = TransactionStore(), TransactionLog(data_dir)
+        first, first_time = _timed(import_statement, io.BytesIO(csv),
+                                   'statement.csv', store, log)
+        again, again_time = _timed(import_statement, io.BytesIO(csv),
+                                   'statement.csv', store, log)
+        assert first['imported'] == rows and again['duplicates'] == rows
+
+    print(f"bulk import @ {rows:,} rows ({len(csv) / 1e6:.0f} MB CSV)")
+    print(f"  first import:        {first_time:8.3f} s "
+          f"({rows / first_time:,.0f} rows/s)")
+    print(f"  re-import (all dup): {again_time:8.3f} s")
+
+
+# Minimal stand-in for the streamlit module: layout calls are no-ops,
+# widgets return their defaults, and charts/tables are serialized the way
+# Streamlit would (Plotly JSON, Arrow) so rendering cost is still measured
+class _SessionState(dict):
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+class _Streamlit(types.ModuleType):
+    def __init__(self):
+        super().__init__('streamlit')
+        self.session_state = _SessionState()
+        self.query_params = {}
+        self.sidebar = self
+        self.caches = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _cache(self, fn=None, **options):
+        if fn is None:
+            return self._cache
+        cache = {}
+
+        @functools.wraps(fn)
+        def cached(*args):
+            key = tuple(arg for arg, name in zip(args, fn.__code__.co_varnames)
+                        if not name.startswith('_'))
+            if key not in cache:
+                cache[key] = fn(*args)
+            return cache[key]
+        cached.clear = cache.clear
+        self.caches.append(cached)
+        return cached
+
+    cache_data = cache_resource = _cache
+
+    def clear_caches(self):
+        for cached in self.caches:
+            cached.clear()
+
+    def columns(self, spec, **kwargs):
+        return [self] * (spec if isinstance(spec, int) else len(spec))
+
+    def form(self, *args, **kwargs):
+        return self
+
+    expander = spinner = container = form
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        return list(options)[index]
+
+    radio = selectbox
+
+    def multiselect(self, label, options, default=None, **kwargs):
+        return list(default or [])
+
+    def slider(self, label, min_value=None, max_value=None, value=None, *args, **kwargs):
+        return value
+
+    def number_input(self, label, min_value=None, max_value=None, value=None, **kwargs):
+        return value if value is not None else (min_value or 0.0)
+
+    def date_input(self, label, value=None, **kwargs):
+        return value
+
+    def text_input(self, label, value='', key=None, **kwargs):
+        return self.session_state.get(key, value)
+
+    def toggle(self, label, value=False, key=None, **kwargs):
+        return self.session_state.get(key, value)
+
+    def button(self, *args, **kwargs):
+        return False
+
+    form_submit_button = download_button = button
+
+    def plotly_chart(self, fig, **kwargs):
+        fig.to_json()
+
+    def dataframe(self, data, **kwargs):
+        pa.Table.from_pandas(data)
+
+
+@contextlib.contextmanager
+def _headless_app(data_dir):
+    # Import finance_tracker against the stub, with its data directory and
+    # default partition inside `data_dir`
+    stub, cwd = _Streamlit(), os.getcwd()
+    saved = {name: sys.modules.get(name) for name in ('streamlit', 'finance_tracker')}
+    sys.modules['streamlit'] = stub
+    sys.modules.pop('finance_tracker', None)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(data_dir)
+    try:
+        import finance_tracker
+        yield finance_tracker, stub
+    finally:
+        os.chdir(cwd)
+        sys.path.pop(0)
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def _measure(fn, stub, traced):
+    stub.clear_caches()
+    if not traced:
+        _, cold = _timed(fn)
+        _, warm = _timed(fn)
+        return {'cold_s': cold, 'warm_s': warm}
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        fn()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    return {'peak_mb': peak / 1e6,
+            'blocks': sum(stat.count_diff for stat in stats),
+            'net_mb': sum(stat.size_diff for stat in stats) / 1e6}
+
+
+PAGES = ['dashboard', 'analytics', 'history', 'budget_page']
+
+
+# Each page function at each size: cold (empty caches) and warm wall time
+# untraced, then peak traced memory and net allocated blocks for a cold run
+def bench_pages(sizes, seed):
+    today = date.today()
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir, \
+            _headless_app(data_dir) as (app, stub):
+        for rows in sizes:
+            frame = synthetic_transactions(rows, seed,
+                                           start=today - timedelta(days=4 * 365 - 1))
+            store = TransactionStore()
+            store.extend(pd.concat([frame, recurring_transactions(today)],
+                                   ignore_index=True))
+            stub.session_state.update(
+                partition=f'bench-{rows}', store=store,
+                log=TransactionLog(os.path.join(data_dir, f'bench-{rows}')),
+                budget={'monthly_limit': 5000,
+                        'category_limits': {'Food': 600, 'Shopping': 400}})
+
+            print(f"pages @ {rows:,} rows")
+            print(f"  {'page':<12} {'cold s':>8} {'warm s':>8} {'peak MB':>8} "
+                  f"{'net MB':>8} {'blocks':>9}")
+            for page in PAGES:
+                fn = getattr(app, page)
+                result = {'rows': rows, 'page': page,
+                          **_measure(fn, stub, traced=False),
+                          **_measure(fn, stub, traced=True)}
+                results.append(result)
+                print(f"  {page:<12} {result['cold_s']:8.3f} {result['warm_s']:8.3f} "
+                      f"{result['peak_mb']:8.1f} {result['net_mb']:8.1f} "
+                      f"{result['blocks']:9,}")
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['rows'], r['page']): r for r in map(json.loads, f)}
+    print(f"vs {baseline_path} (new / old)")
+    for result in results:
+        old = baseline.get((result['rows'], result['page']))
+        if old is None:
+            continue
+        ratios = "  ".join(f"{metric} {result[metric] / old[metric]:5.2f}x"
+                           for metric in ('cold_s', 'warm_s', 'peak_mb') if old[metric])
+        print(f"  {result['rows']:>9,} {result['page']:<12} {ratios}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Finance tracker benchmarks")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', choices=['persistence', 'import', 'pages'])
+    parser.add_argument('--page-rows', type=int, nargs='+',
+                        default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--output', help="append page results as JSON lines")
+    parser.add_argument('--baseline', help="page results from an earlier --output run")
+    args = parser.parse_args()
+    if args.only in (None, 'persistence'):
+        bench_persistence(args.rows, args.seed)
+    if args.only in (None, 'import'):
+        bench_import(args.rows, args.seed)
+    if args.only in (None, 'pages'):
+        results = bench_pages(args.page_rows, args.seed)
+        if args.baseline:
+            compare(results, args.baseline)
+        if args.output:
+            stamp = datetime.now().isoformat(timespec='seconds')
+            with open(args.output, 'a') as f:
+                f.writelines(json.dumps({'run': stamp, 'seed': args.seed, **result}) + '\n'
+                             for result in results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# budget.py
+import numpy as np
+
+ALERT_THRESHOLDS = (50, 80, 100)   # percent of a limit
+ROLLING_DAYS = 30
+
+
+# Budget figures read straight from the AggregateEngine's month and day
+# buckets (in cents) - every lookup is O(1) (O(ROLLING_DAYS) for the
+# rolling window) regardless of how long the history is
+class BudgetEngine:
+    def __init__(self, aggregates):
+        self.aggregates = aggregates
+
+    def month_spend(self, day, category=None):
+        # Expenses in the calendar month containing `day`
+        month = np.datetime64(day, 'M')
+        if category is None:
+            return self.aggregates.by_month.get((month, 'Expense'), 0) / 100
+        return self.aggregates.by_month_category.get((month, 'Expense', category), 0) / 100
+
+    def rolling_spend(self, day, days=ROLLING_DAYS):
+        # Expenses in the `days` days ending on `day`, inclusive
+        end = np.datetime64(day, 'D')
+        by_day = self.aggregates.by_day
+        return sum(by_day.get(('Expense', end - offset), 0) for offset in range(days)) / 100
+
+    @staticmethod
+    def status(limit, spent, thresholds=ALERT_THRESHOLDS):
+        percentage = (spent / limit * 100) if limit > 0 else 0
+        crossed = [threshold for threshold in thresholds if percentage >= threshold]
+        return {
+            'limit': limit,
+            'spent': spent,
+            'remaining': limit - spent,
+            'percentage': percentage,
+            'alert': crossed[-1] if crossed else None,
+        }
@@ -0,0 +1,46 @@
+# downsample.py
+import numpy as np
+
+POINT_BUDGET = 500
+RESOLUTIONS = ['Auto', 'Weekly', 'Monthly', 'LTTB']
+BUCKET_FREQ = {'Weekly': 'W', 'Monthly': 'MS'}
+
+
+def choose_resolution(span_days, budget=POINT_BUDGET):
+    # Finest bucket size that keeps the series within the point budget;
+    # raw daily points only once the visible range is narrow enough
+    if span_days <= budget:
+        return 'Daily'
+    if span_days / 7 <= budget:
+        return 'Weekly'
+    return 'Monthly'
+
+
+def bucket(series, resolution):
+    # series: amounts indexed by date
+    if resolution == 'Daily':
+        return series
+    return series.resample(BUCKET_FREQ[resolution]).sum()
+
+
+def lttb(x, y, threshold=POINT_BUDGET):
+    # Largest-Triangle-Three-Buckets: indices of `threshold` points that
+    # keep the visual shape of the series (first and last always kept)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, threshold - 1).astype('int64')
+    selected = np.empty(threshold, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
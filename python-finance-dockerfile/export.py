@@ -0,0 +1,55 @@
+# export.py
+import gzip
+import io
+import tempfile
+from functools import partial
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 50_000
+SPOOL_BYTES = 16 * 1024 * 1024   # spill to disk beyond this
+
+
+# Exports stream the selected rows out of the store CHUNK_ROWS at a time into
+# a spooled temp file, so only one chunk is ever materialized as a DataFrame.
+# Both return the file rewound to the start.
+def _chunks(store, positions, chunk_rows):
+    # Always yields at least one (possibly empty) chunk so headers get written
+    for start in range(0, max(len(positions), 1), chunk_rows):
+        yield store.take(positions[start:start + chunk_rows])
+
+
+def export_csv(store, positions, compress=False, chunk_rows=CHUNK_ROWS):
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    raw = gzip.GzipFile(fileobj=spool, mode='wb') if compress else spool
+    text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    for i, chunk in enumerate(_chunks(store, positions, chunk_rows)):
+        chunk.to_csv(text, index=False, header=(i == 0))
+    text.flush()
+    text.detach()
+    if compress:
+        raw.close()   # writes the gzip trailer, leaves spool open
+    spool.seek(0)
+    return spool
+
+
+def export_parquet(store, positions, chunk_rows=CHUNK_ROWS):
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    writer = None
+    for chunk in _chunks(store, positions, chunk_rows):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(spool, table.schema)
+        writer.write_table(table)   # one row group per chunk
+    writer.close()
+    spool.seek(0)
+    return spool
+
+
+# Label -> (file extension, mime type, exporter)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv', export_csv),
+    'CSV (gzip)': ('csv.gz', 'application/gzip', partial(export_csv, compress=True)),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet', export_parquet),
+}
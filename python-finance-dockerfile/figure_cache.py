@@ -0,0 +1,34 @@
+# figure_cache.py
+import threading
+from collections import OrderedDict
+
+
+# LRU cache of built Plotly figures. Keys include the transaction store
+# version, so any write naturally misses and old entries age out.
+class FigureCache:
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._figures)
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return self._figures[key]
+        # Build outside the lock - two sessions racing on one key just
+        # both build it once
+        figure = build()
+        with self._lock:
+            self.misses += 1
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+        return figure
@@ -1,10 +1,22 @@
 # finance_tracker.py
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 import json
+import profiling
+from persistence import PartitionRegistry, partition_key
+from profiling import Profiler
+from export import EXPORT_FORMATS
+from figure_cache import FigureCache
+from forecast import forecast
+from downsample import RESOLUTIONS, bucket, choose_resolution, lttb
+from budget import ROLLING_DAYS, BudgetEngine
+from importer import (EXPENSE_CATEGORIES, INCOME_CATEGORIES, PAYMENT_METHODS,
+                      READERS, import_statement)
 
 # Page configuration
 st.set_page_config(
@@ -45,30 +57,162 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Disk-backed per-user transaction stores, shared by all sessions in the
+# process - a session only holds references to its user's partition
+@st.cache_resource
+def partition_registry():
+    return PartitionRegistry()
+
 # Initialize session state
-if 'transactions' not in st.session_state:
-    st.session_state.transactions = []
+if 'user_id' not in st.session_state:
+    st.session_state.user_id = st.query_params.get('user', 'default')
+if not st.session_state.user_id.strip():
+    st.sidebar.text_input("User", key="user_id")
+    st.info("Enter a user name in the sidebar to see your transactions.")
+    st.stop()
+st.session_state.partition = partition_key(st.session_state.user_id)
+st.session_state.store, st.session_state.log = partition_registry().open(
+    st.session_state.user_id)
 if 'budget' not in st.session_state:
     st.session_state.budget = {'monthly_limit': 5000}
 if 'categories' not in st.session_state:
-    st.session_state.categories = ['Food', 'Transport', 'Shopping', 
-                                   'Entertainment', 'Bills', 'Health', 'Other']
+    st.session_state.categories = list(EXPENSE_CATEGORIES)
+if 'profiling' not in st.session_state:
+    st.session_state.profiling = profiling.ENABLED
+
+# Opt-in timing spans, shared by all sessions; FINANCE_PROFILE_PORT also
+# serves them on a local /metrics (Prometheus) and /spans (JSON lines) endpoint
+@st.cache_resource
+def profiler():
+    profiler = Profiler()
+    if profiling.PORT:
+        profiler.serve(profiling.PORT)
+    return profiler
+
+def span(name):
+    return profiler().span(name) if st.session_state.profiling else nullcontext()
+
+# Plotly figures are shared across reruns and sessions of a user, and
+# rebuilt only when that user's store version or the chart parameters change
+@st.cache_resource
+def figure_cache():
+    return FigureCache(maxsize=256)
+
+def cached_figure(build, *params):
+    store = st.session_state.store
+    key = (st.session_state.partition, build.__name__, store.version) + params
+    def timed_build():
+        with span(f"chart.{build.__name__}"):
+            return build(store, *params)
+    return figure_cache().get(key, timed_build)
+
+def plot(build, *params):
+    fig = cached_figure(build, *params)
+    if fig is not None:
+        with span(f"render.{build.__name__}"):
+            st.plotly_chart(fig, use_container_width=True)
+
+# Forecasts are cached per partition and store version (and day)
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_forecast(partition, version, months, today, _store):
+    return forecast(_store, months, today)
+
+# Chart builders - each returns None when there is nothing to plot
+def expense_category_chart(store):
+    category_sum = store.aggregates.category_totals('Expense')
+    if category_sum.empty:
+        return None
+    return px.pie(category_sum, values='amount', names='category',
+                 title='Expenses by Category',
+                 hole=0.4)
+
+def income_expense_chart(store):
+    return px.bar(store.aggregates.type_totals(), x='type', y='amount',
+                 title='Income vs Expenses',
+                 color='type',
+                 color_discrete_map={'Income': '#10B981', 'Expense': '#EF4444'})
+
+def expense_trend_chart(store, start, end, resolution):
+    daily = store.aggregates.daily_totals('Expense').set_index('date')['amount']
+    daily = daily[pd.Timestamp(start):pd.Timestamp(end)]
+    if resolution == 'LTTB':
+        keep = lttb(daily.index.to_numpy('int64'), daily.to_numpy())
+        series, label = daily.iloc[keep], 'Daily, LTTB downsampled'
+    else:
+        if resolution == 'Auto':
+            resolution = choose_resolution((end - start).days + 1)
+        series, label = bucket(daily, resolution), resolution
+    trend = series.rename_axis('date').reset_index(name='amount')
+    return px.line(trend, x='date', y='amount',
+                  title=f'Expenses Over Time ({label})')
+
+def monthly_chart(store):
+    return px.bar(store.aggregates.monthly_totals(), x='month', y='amount', color='type',
+                 title='Monthly Income vs Expenses',
+                 barmode='group',
+                 color_discrete_map={'Income': '#10B981', 'Expense': '#EF4444'})
+
+def top_categories_chart(store):
+    category_sum = store.aggregates.category_totals('Expense')
+    if category_sum.empty:
+        return None
+    top_categories = category_sum.set_index('category')['amount'].sort_values(
+        ascending=False).head(5)
+    return px.bar(x=top_categories.values, y=top_categories.index,
+                 orientation='h',
+                 labels={'x': 'Amount ($)', 'y': 'Category'})
+
+def payment_method_chart(store):
+    payment_dist = store.aggregates.payment_method_totals().set_index(
+        'payment_method')['amount']
+    return px.pie(values=payment_dist.values, names=payment_dist.index,
+                 hole=0.3)
+
+def weekday_chart(store):
+    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 
+                 'Friday', 'Saturday', 'Sunday']
+    expenses = store.query(types=['Expense'])
+    # 1970-01-01 was a Thursday, so day number + 3 gives Monday = 0
+    weekday = (store.raw('date')[expenses] + 3) % 7
+    counts = np.bincount(weekday, minlength=7)
+    sums = np.bincount(weekday, weights=store.raw('amount')[expenses], minlength=7) / 100
+    expense_by_day = pd.Series(np.divide(sums, counts, out=np.full(7, np.nan),
+                                         where=counts > 0), index=day_order)
+    return px.bar(x=expense_by_day.index, y=expense_by_day.values,
+                 labels={'x': 'Day', 'y': 'Average Expense ($)'},
+                 title='Average Daily Spending by Weekday')
+
+def forecast_chart(store, months, today):
+    _, projection = cached_forecast(st.session_state.partition, store.version,
+                                    months, today, store)
+    fig = go.Figure()
+    fig.add_bar(x=projection['month'], y=projection['income'], name='Income',
+                marker_color='#10B981')
+    fig.add_bar(x=projection['month'], y=projection['expense'], name='Expense',
+                marker_color='#EF4444')
+    fig.add_scatter(x=projection['month'], y=projection['balance'], name='Balance',
+                    mode='lines+markers', yaxis='y2')
+    fig.update_layout(title='Projected Cash Flow and Balance', barmode='group',
+                      yaxis=dict(title='Amount ($)'),
+                      yaxis2=dict(title='Balance ($)', overlaying='y', side='right'))
+    return fig
 
 # Sidebar Navigation
 def sidebar_nav():
     st.sidebar.markdown("## 💰")
     st.sidebar.title("Finance Tracker")
+    st.sidebar.text_input("User", key="user_id")
     page = st.sidebar.radio(
         "Navigation",
         ["📊 Dashboard", "➕ Add Transaction", "📈 Analytics", "💳 Budget", "📋 History"]
     )
     
     # Quick Stats in Sidebar
-    if st.session_state.transactions:
-        df = pd.DataFrame(st.session_state.transactions)
-        total_income = df[df['type'] == 'Income']['amount'].sum()
-        total_expense = df[df['type'] == 'Expense']['amount'].sum()
-        balance = total_income - total_expense
+    if st.session_state.store:
+        totals = st.session_state.store.aggregates
+        total_income = totals.total_income
+        total_expense = totals.total_expense
+        balance = totals.balance
         
         st.sidebar.markdown("---")
         st.sidebar.markdown("### Quick Stats")
@@ -76,26 +220,49 @@ def sidebar_nav():
         st.sidebar.metric("Income", f"${total_income:,.2f}")
         st.sidebar.metric("Expenses", f"${total_expense:,.2f}")
     
+    st.sidebar.markdown("---")
+    st.sidebar.toggle("⏱️ Profiling", key="profiling")
+    
     return page
 
+# Profiling panel - this rerun's spans plus totals across all sessions
+def debug_panel(run):
+    timings = profiler()
+    with st.sidebar.expander("⏱️ Profiling", expanded=True):
+        spans = pd.DataFrame(timings.recent(run))
+        if not spans.empty:
+            spans = spans.sort_values('start', kind='stable')
+            st.caption(f"This run: {spans.loc[spans['depth'] == 0, 'seconds'].sum() * 1000:,.1f} ms")
+            st.dataframe(pd.DataFrame({
+                'span': ['  ' * depth + name for depth, name in zip(spans['depth'], spans['span'])],
+                'ms': (spans['seconds'] * 1000).round(2),
+            }), hide_index=True, use_container_width=True)
+        st.write("All runs")
+        st.dataframe(pd.DataFrame(timings.summary()).round(2), hide_index=True,
+                     use_container_width=True)
+        st.download_button("📥 Spans (JSON lines)", data=timings.export_jsonl,
+                           file_name="finance_spans.jsonl", mime="application/x-ndjson")
+        if profiling.PORT:
+            st.caption(f"Metrics: http://127.0.0.1:{profiling.PORT}/metrics")
+
 # Dashboard Page
 def dashboard():
     st.markdown('<h1 class="main-header">💰 Personal Finance Dashboard</h1>', 
                 unsafe_allow_html=True)
     
-    if not st.session_state.transactions:
+    if not st.session_state.store:
         st.info("No transactions yet. Add your first transaction to get started!")
         return
     
-    df = pd.DataFrame(st.session_state.transactions)
-    df['date'] = pd.to_datetime(df['date'])
+    totals = st.session_state.store.aggregates
     
     # Calculate metrics
-    total_income = df[df['type'] == 'Income']['amount'].sum()
-    total_expense = df[df['type'] == 'Expense']['amount'].sum()
-    balance = total_income - total_expense
-    monthly_budget = st.session_state.budget['monthly_limit']
-    budget_used = (total_expense / monthly_budget * 100) if monthly_budget > 0 else 0
+    total_income = totals.total_income
+    total_expense = totals.total_expense
+    balance = totals.balance
+    engine = BudgetEngine(totals)
+    budget = engine.status(st.session_state.budget['monthly_limit'],
+                           engine.month_spend(datetime.now()))
     
     # Display metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -108,8 +275,8 @@ def dashboard():
     with col3:
         st.metric("📉 Total Expenses", f"${total_expense:,.2f}")
     with col4:
-        st.metric("📊 Budget Used", f"{budget_used:.1f}%",
-                 delta=f"${monthly_budget - total_expense:,.2f} left")
+        st.metric("📊 Budget Used", f"{budget['percentage']:.1f}%",
+                 delta=f"${budget['remaining']:,.2f} left this month")
     
     st.markdown("---")
     
@@ -118,36 +285,29 @@ def dashboard():
     
     with col1:
         # Expense by Category
-        expense_df = df[df['type'] == 'Expense']
-        if not expense_df.empty:
-            category_sum = expense_df.groupby('category')['amount'].sum().reset_index()
-            fig = px.pie(category_sum, values='amount', names='category',
-                        title='Expenses by Category',
-                        hole=0.4)
-            st.plotly_chart(fig, use_container_width=True)
+        plot(expense_category_chart)
     
     with col2:
         # Income vs Expense
-        type_sum = df.groupby('type')['amount'].sum().reset_index()
-        fig = px.bar(type_sum, x='type', y='amount',
-                    title='Income vs Expenses',
-                    color='type',
-                    color_discrete_map={'Income': '#10B981', 'Expense': '#EF4444'})
-        st.plotly_chart(fig, use_container_width=True)
+        plot(income_expense_chart)
     
     # Spending Trend
     st.subheader("📅 Spending Trend")
-    daily_expense = df[df['type'] == 'Expense'].groupby(
-        df['date'].dt.date)['amount'].sum().reset_index()
-    daily_expense.columns = ['date', 'amount']
-    
-    fig = px.line(daily_expense, x='date', y='amount',
-                 title='Daily Expenses Over Time')
-    st.plotly_chart(fig, use_container_width=True)
+    first, last = st.session_state.store.date_span()
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        # Zooming in far enough switches Auto to raw daily points
+        start, end = (st.slider("Date range", min_value=first, max_value=last,
+                                value=(first, last))
+                      if first < last else (first, last))
+    with col2:
+        resolution = st.selectbox("Resolution", RESOLUTIONS)
+    plot(expense_trend_chart, start, end, resolution)
     
     # Recent Transactions
     st.subheader("🕒 Recent Transactions")
-    recent = df.sort_values('date', ascending=False).head(5)
+    with span("frame.recent"):
+        recent = st.session_state.store.take(st.session_state.store.date_order()[::-1][:5])
     st.dataframe(recent[['date', 'type', 'category', 'amount', 'description']], 
                 use_container_width=True, hide_index=True)
 
@@ -170,11 +330,8 @@ def add_transaction():
                 if transaction_type == "Expense":
                     category = st.selectbox("Category", st.session_state.categories)
                 else:
-                    category = st.selectbox("Category", ["Salary", "Freelance", 
-                                                        "Investment", "Gift", "Other"])
-                payment_method = st.selectbox("Payment Method", 
-                                            ["Cash", "Credit Card", "Debit Card", 
-                                             "Bank Transfer", "Digital Wallet"])
+                    category = st.selectbox("Category", INCOME_CATEGORIES)
+                payment_method = st.selectbox("Payment Method", PAYMENT_METHODS)
             
             description = st.text_area("Description (optional)")
             
@@ -190,7 +347,7 @@ def add_transaction():
                     'payment_method': payment_method,
                     'timestamp': datetime.now().isoformat()
                 }
-                st.session_state.transactions.append(transaction)
+                st.session_state.log.append(st.session_state.store, transaction)
                 st.success(f"✅ {transaction_type} of ${amount:,.2f} added successfully!")
                 st.balloons()
     
@@ -206,67 +363,112 @@ def add_transaction():
             </ul>
         </div>
         """, unsafe_allow_html=True)
+    
+    # Bulk import
+    st.markdown("---")
+    st.subheader("📂 Import Bank Statement")
+    uploaded = st.file_uploader("CSV, OFX/QFX or JSON statement",
+                                type=[ext.lstrip('.') for ext in READERS])
+    if uploaded is not None and st.button("Import Transactions", type="primary"):
+        try:
+            with st.spinner("Importing..."):
+                result = import_statement(uploaded, uploaded.name,
+                                          st.session_state.store, st.session_state.log,
+                                          st.session_state.categories)
+        except ValueError as e:
+            # Unreadable files: empty or malformed CSV/JSON, wrong encoding,
+            # unsupported extension
+            st.error(f"Could not import {uploaded.name}: {e}")
+        else:
+            st.success(f"✅ Imported {result['imported']:,} transactions")
+            if result['duplicates']:
+                st.info(f"Skipped {result['duplicates']:,} transactions already recorded")
+            if result['rejected']:
+                details = ", ".join(f"{count:,} {reason}" for reason, count
+                                    in result['reasons'].items() if count)
+                st.warning(f"Rejected {result['rejected']:,} rows ({details})")
 
 # Analytics Page
 def analytics():
     st.title("📈 Financial Analytics")
     
-    if not st.session_state.transactions:
+    if not st.session_state.store:
         st.warning("No data available for analysis. Add transactions first.")
         return
     
-    df = pd.DataFrame(st.session_state.transactions)
-    df['date'] = pd.to_datetime(df['date'])
-    df['month'] = df['date'].dt.to_period('M').astype(str)
-    
     # Monthly Analysis
     st.subheader("📆 Monthly Analysis")
-    
-    monthly_data = df.groupby(['month', 'type'])['amount'].sum().reset_index()
-    fig = px.bar(monthly_data, x='month', y='amount', color='type',
-                title='Monthly Income vs Expenses',
-                barmode='group',
-                color_discrete_map={'Income': '#10B981', 'Expense': '#EF4444'})
-    st.plotly_chart(fig, use_container_width=True)
+    plot(monthly_chart)
     
     # Category-wise Analysis
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📊 Top Expense Categories")
-        expense_df = df[df['type'] == 'Expense']
-        if not expense_df.empty:
-            top_categories = expense_df.groupby('category')['amount'].sum().sort_values(
-                ascending=False).head(5)
-            fig = px.bar(x=top_categories.values, y=top_categories.index,
-                        orientation='h',
-                        labels={'x': 'Amount ($)', 'y': 'Category'})
-            st.plotly_chart(fig, use_container_width=True)
+        plot(top_categories_chart)
     
     with col2:
         st.subheader("💳 Payment Methods")
-        payment_dist = df.groupby('payment_method')['amount'].sum()
-        fig = px.pie(values=payment_dist.values, names=payment_dist.index,
-                    hole=0.3)
-        st.plotly_chart(fig, use_container_width=True)
+        plot(payment_method_chart)
     
     # Spending Pattern
     st.subheader("📉 Spending Pattern")
-    df['day_of_week'] = df['date'].dt.day_name()
-    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 
-                 'Friday', 'Saturday', 'Sunday']
-    expense_by_day = df[df['type'] == 'Expense'].groupby(
-        'day_of_week')['amount'].mean().reindex(day_order)
-    
-    fig = px.bar(x=expense_by_day.index, y=expense_by_day.values,
-                labels={'x': 'Day', 'y': 'Average Expense ($)'},
-                title='Average Daily Spending by Weekday')
-    st.plotly_chart(fig, use_container_width=True)
+    plot(weekday_chart)
+    
+    # Forecast
+    st.subheader("🔮 Cash Flow Forecast")
+    store = st.session_state.store
+    months = st.slider("Months ahead", 1, 24, 6)
+    today = datetime.now().date()
+    with span("forecast"):
+        recurring, _ = cached_forecast(st.session_state.partition, store.version,
+                                       months, today, store)
+    plot(forecast_chart, months, today)
+    
+    if recurring.empty:
+        st.info("No recurring transactions detected yet.")
+    else:
+        st.write("Detected recurring transactions")
+        st.dataframe(
+            recurring.assign(next=recurring['next'].astype('datetime64[D]'))[
+                ['type', 'category', 'amount', 'period', 'occurrences', 'next']],
+            use_container_width=True,
+            hide_index=True
+        )
 
 # Budget Page
+def budget_bar(percentage):
+    if percentage <= 50:
+        color = "green"
+    elif percentage <= 80:
+        color = "orange"
+    else:
+        color = "red"
+    
+    st.markdown(f"""
+    <div style="background-color: #f0f0f0; border-radius: 10px; height: 30px;">
+        <div style="background-color: {color}; width: {min(percentage, 100)}%; 
+             height: 30px; border-radius: 10px; text-align: center; 
+             line-height: 30px; color: white; font-weight: bold;">
+            {percentage:.1f}%
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def budget_alert(name, status):
+    if status['alert'] is None:
+        return
+    if status['alert'] >= 100:
+        st.error(f"🚨 {name} exceeded by ${-status['remaining']:,.2f}")
+    elif status['alert'] >= 80:
+        st.warning(f"⚠️ {name}: {status['percentage']:.0f}% used")
+    else:
+        st.info(f"{name}: over {status['alert']}% used")
+
 def budget_page():
     st.title("💳 Budget Management")
     
+    category_limits = st.session_state.budget.setdefault('category_limits', {})
     col1, col2 = st.columns([1, 1])
     
     with col1:
@@ -278,49 +480,55 @@ def budget_page():
         if st.button("Update Budget"):
             st.session_state.budget['monthly_limit'] = new_budget
             st.success(f"Budget updated to ${new_budget:,.2f}")
+        
+        with st.expander("Category Budgets"):
+            with st.form("category_budgets"):
+                new_limits = {
+                    category: st.number_input(f"{category} ($, 0 = no limit)",
+                                              value=category_limits.get(category, 0),
+                                              min_value=0, step=50)
+                    for category in st.session_state.categories
+                }
+                if st.form_submit_button("Update Category Budgets"):
+                    category_limits.clear()
+                    category_limits.update({category: limit for category, limit
+                                            in new_limits.items() if limit > 0})
+                    st.success("Category budgets updated")
     
     with col2:
-        if st.session_state.transactions:
-            df = pd.DataFrame(st.session_state.transactions)
-            total_expense = df[df['type'] == 'Expense']['amount'].sum()
-            budget_limit = st.session_state.budget['monthly_limit']
-            remaining = budget_limit - total_expense
-            percentage = (total_expense / budget_limit * 100) if budget_limit > 0 else 0
-            
-            st.subheader("Budget Status")
-            st.metric("Budget Limit", f"${budget_limit:,.2f}")
-            st.metric("Spent", f"${total_expense:,.2f}")
-            st.metric("Remaining", f"${remaining:,.2f}", 
-                     delta=f"{percentage:.1f}% used")
+        if st.session_state.store:
+            engine = BudgetEngine(st.session_state.store.aggregates)
+            today = datetime.now().date()
+            status = engine.status(st.session_state.budget['monthly_limit'],
+                                   engine.month_spend(today))
             
-            # Progress bar
-            if percentage <= 50:
-                color = "green"
-            elif percentage <= 80:
-                color = "orange"
-            else:
-                color = "red"
+            st.subheader(f"Budget Status - {today.strftime('%B %Y')}")
+            st.metric("Budget Limit", f"${status['limit']:,.2f}")
+            st.metric("Spent This Month", f"${status['spent']:,.2f}")
+            st.metric("Remaining", f"${status['remaining']:,.2f}", 
+                     delta=f"{status['percentage']:.1f}% used")
+            st.metric(f"Last {ROLLING_DAYS} Days", f"${engine.rolling_spend(today):,.2f}")
             
-            st.markdown(f"""
-            <div style="background-color: #f0f0f0; border-radius: 10px; height: 30px;">
-                <div style="background-color: {color}; width: {min(percentage, 100)}%; 
-                     height: 30px; border-radius: 10px; text-align: center; 
-                     line-height: 30px; color: white; font-weight: bold;">
-                    {percentage:.1f}%
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+            budget_bar(status['percentage'])
+            budget_alert("Monthly budget", status)
+    
+    if st.session_state.store and category_limits:
+        st.subheader("Category Budgets This Month")
+        for category, limit in category_limits.items():
+            status = engine.status(limit, engine.month_spend(today, category))
+            st.write(f"**{category}** - ${status['spent']:,.2f} of ${limit:,.2f}")
+            budget_bar(status['percentage'])
+            budget_alert(f"{category} budget", status)
 
 # History Page
 def history():
     st.title("📋 Transaction History")
     
-    if not st.session_state.transactions:
+    if not st.session_state.store:
         st.info("No transaction history available.")
         return
     
-    df = pd.DataFrame(st.session_state.transactions)
-    df['date'] = pd.to_datetime(df['date'])
+    store = st.session_state.store
     
     # Filters
     col1, col2, col3 = st.columns(3)
@@ -330,62 +538,79 @@ def history():
                                     ["Income", "Expense"],
                                     default=["Income", "Expense"])
     with col2:
-        categories = df['category'].unique().tolist()
+        categories = store.distinct('category')
         filter_category = st.multiselect("Filter by Category", 
                                         categories,
                                         default=categories)
     with col3:
         date_range = st.date_input("Date Range", 
-                                  value=(df['date'].min(), df['date'].max()),
+                                  value=store.date_span(),
                                   key="date_range")
     
-    # Apply filters
-    filtered_df = df[
-        (df['type'].isin(filter_type)) &
-        (df['category'].isin(filter_category)) &
-        (df['date'] >= pd.to_datetime(date_range[0])) &
-        (df['date'] <= pd.to_datetime(date_range[1]))
-    ]
+    # Apply filters via the store's indexes, newest first
+    with span("query.history"):
+        positions = store.query(types=filter_type, categories=filter_category,
+                                start=date_range[0], end=date_range[1])[::-1]
     
-    st.subheader(f"Showing {len(filtered_df)} transactions")
+    st.subheader(f"Showing {len(positions)} transactions")
     
-    # Display table
-    st.dataframe(
-        filtered_df.sort_values('date', ascending=False)[
-            ['date', 'type', 'category', 'amount', 'payment_method', 'description']
-        ],
-        use_container_width=True,
-        hide_index=True
-    )
+    # Pagination - only the visible page is materialized and sent to the browser
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+    page_count = max(1, -(-len(positions) // page_size))
+    with col2:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1)
     
-    # Export option
-    if st.button("📥 Export to CSV"):
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="Download CSV",
-            data=csv,
-            file_name=f"transactions_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
+    start = (page - 1) * page_size
+    with span("frame.history_page"):
+        page_df = store.take(positions[start:start + page_size])
+    
+    # Display table
+    with span("render.history_table"):
+        st.dataframe(
+            page_df[['date', 'type', 'category', 'amount', 'payment_method', 'description']],
+            use_container_width=True,
+            hide_index=True
         )
+    st.caption(f"Page {page} of {page_count}")
+    
+    # Export option - the file is generated in chunks only when clicked
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        export_format = st.selectbox("Export format", list(EXPORT_FORMATS))
+    extension, mime, exporter = EXPORT_FORMATS[export_format]
+    st.download_button(
+        label=f"📥 Export to {export_format}",
+        data=lambda: exporter(store, positions).read(),
+        file_name=f"transactions_{datetime.now().strftime('%Y%m%d')}.{extension}",
+        mime=mime
+    )
 
 # Main App
 def main():
-    page = sidebar_nav()
-    
-    if page == "📊 Dashboard":
-        dashboard()
-    elif page == "➕ Add Transaction":
-        add_transaction()
-    elif page == "📈 Analytics":
-        analytics()
-    elif page == "💳 Budget":
-        budget_page()
-    elif page == "📋 History":
-        history()
-    
-    # Footer
-    st.markdown("---")
-    st.markdown("**Personal Finance Tracker** © 2024 | Built with Streamlit")
+    run = (profiler().run(partition=st.session_state.partition)
+           if st.session_state.profiling else nullcontext())
+    with run as run_id:
+        with span("sidebar"):
+            page = sidebar_nav()
+        
+        render = {
+            "📊 Dashboard": dashboard,
+            "➕ Add Transaction": add_transaction,
+            "📈 Analytics": analytics,
+            "💳 Budget": budget_page,
+            "📋 History": history,
+        }[page]
+        with span(f"page.{render.__name__}"):
+            render()
+        
+        # Footer
+        st.markdown("---")
+        st.markdown("**Personal Finance Tracker** © 2024 | Built with Streamlit")
+    
+    if run_id is not None:
+        debug_panel(run_id)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,150 @@
+# forecast.py
+import numpy as np
+import pandas as pd
+
+MIN_OCCURRENCES = 3
+BASELINE_MONTHS = 6     # complete months averaged for non-recurring flow
+KEYS = ['type', 'category', 'cents']
+
+# Period name -> (nominal interval in days, tolerance for both the median
+# interval and its standard deviation, calendar months per step or 0 for
+# periods that step in days)
+PERIODS = {
+    'Weekly': (7.0, 1.0, 0),
+    'Biweekly': (14.0, 2.0, 0),
+    'Monthly': (30.44, 3.0, 1),
+    'Quarterly': (91.31, 5.0, 3),
+    'Yearly': (365.25, 7.0, 12),
+}
+
+
+def _rows(store, positions=None):
+    # Type and category as dictionary codes until results are decoded
+    positions = slice(None) if positions is None else positions
+    return pd.DataFrame({
+        'type': store.raw('type')[positions],
+        'category': store.raw('category')[positions],
+        'cents': store.raw('amount')[positions],
+        'day': store.raw('date')[positions].astype('int64'),
+    })
+
+
+def _decode(store, frame):
+    return frame.assign(type=store.labels('type')[frame['type'].to_numpy()],
+                        category=store.labels('category')[frame['category'].to_numpy()])
+
+
+def _months(days):
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+
+
+def _next_dates(last, step_days, step_months):
+    # Day-based series add the step; calendar series keep the day of month
+    # (clipped to the month's length)
+    last_month = _months(last)
+    day_of_month = last - last_month.astype('datetime64[M]').astype('datetime64[D]').astype('int64')
+    month = last_month + step_months
+    month_start = month.astype('datetime64[M]').astype('datetime64[D]').astype('int64')
+    month_length = (month + 1).astype('datetime64[M]').astype('datetime64[D]').astype('int64') - month_start
+    by_month = month_start + np.minimum(day_of_month, month_length - 1)
+    return np.where(step_months > 0, by_month, last + np.round(step_days).astype('int64'))
+
+
+# Series of same type/category/amount transactions that repeat at a regular
+# weekly..yearly interval and are still active, found with one sort and
+# grouped diffs over the whole history
+def find_recurring(store, today):
+    return _decode(store, _find_recurring(store, today))
+
+
+def _find_recurring(store, today):
+    today = np.datetime64(today, 'D').astype('int64')
+    df = _rows(store).drop_duplicates(KEYS + ['day'])
+    df = df[df.duplicated(KEYS, keep=False)].sort_values(KEYS + ['day'])
+    df['interval'] = df.groupby(KEYS)['day'].diff()
+    stats = df.groupby(KEYS).agg(occurrences=('day', 'size'), last=('day', 'max'),
+                                 median=('interval', 'median'),
+                                 std=('interval', 'std')).reset_index()
+    stats = stats[stats['occurrences'] >= MIN_OCCURRENCES]
+
+    matches = [(stats['median'] - days).abs() <= tolerance
+               for days, tolerance, _ in PERIODS.values()]
+    stats['period'] = np.select(matches, list(PERIODS), default='')
+    stats = stats[stats['period'] != '']
+    spec = pd.DataFrame(PERIODS, index=['step_days', 'tolerance', 'step_months']).T
+    stats = stats.join(spec, on='period')
+    regular = stats['std'].fillna(0) <= stats['tolerance']
+    active = stats['last'] >= today - 2 * stats['median']
+    stats = stats[regular & active].drop(columns='tolerance').reset_index(drop=True)
+
+    stats['step_months'] = stats['step_months'].astype('int64')
+    stats['amount'] = stats['cents'] / 100
+    stats['next'] = _next_dates(stats['last'].to_numpy(), stats['step_days'].to_numpy(),
+                                stats['step_months'].to_numpy())
+    return stats
+
+
+def _occurrences(origin, step, lo, hi):
+    # Every k >= 1 with origin + k * step in [lo, hi), for all series at once
+    first_k = np.maximum(np.ceil((lo - origin) / step), 1).astype('int64')
+    last_k = np.ceil((hi - origin) / step).astype('int64') - 1
+    counts = np.maximum(last_k - first_k + 1, 0)
+    series = np.repeat(np.arange(len(origin)), counts)
+    k = first_k[series] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return series, origin[series] + k * step[series]
+
+
+def _recurring_flow(recurring, first_month, end_month):
+    # Projected occurrences in months [first_month, end_month) as
+    # (month, type, amount) rows - calendar series step in months, weekly
+    # ones in days
+    calendar = recurring[recurring['step_months'] > 0]
+    daily = recurring[recurring['step_months'] == 0]
+    months_series, months = _occurrences(
+        _months(calendar['last'].to_numpy()), calendar['step_months'].to_numpy(),
+        first_month, end_month)
+    lo, hi = (np.datetime64(int(m), 'M').astype('datetime64[D]').astype('int64')
+              for m in (first_month, end_month))
+    days_series, days = _occurrences(daily['last'].to_numpy().astype('float64'),
+                                     daily['step_days'].to_numpy(), lo, hi)
+    return pd.DataFrame({
+        'month': np.concatenate([months, _months(np.round(days).astype('int64'))]),
+        'type': np.concatenate([calendar['type'].to_numpy()[months_series],
+                                daily['type'].to_numpy()[days_series]]),
+        'amount': np.concatenate([calendar['amount'].to_numpy()[months_series],
+                                  daily['amount'].to_numpy()[days_series]]),
+    })
+
+
+# Projected monthly income, expense, net and running balance for the next
+# `months` calendar months: recurring series are extended forward and the
+# average non-recurring flow of recent complete months is added on top
+def forecast(store, months, today):
+    recurring = _find_recurring(store, today)
+    this_month = np.datetime64(today, 'M')
+    horizon = this_month + 1 + np.arange(months)
+
+    window_start = this_month - BASELINE_MONTHS
+    window = _rows(store, store.query(start=window_start.astype('datetime64[D]'),
+                                      end=this_month.astype('datetime64[D]') - 1))
+    is_recurring = pd.MultiIndex.from_frame(window[KEYS]).isin(
+        pd.MultiIndex.from_frame(recurring[KEYS]))
+    first_month = store.date_span()[0]
+    covered = int(np.clip(this_month - np.datetime64(first_month, 'M'), 1, BASELINE_MONTHS))
+    baseline = window[~is_recurring].groupby('type')['cents'].sum() / 100 / covered
+    baseline.index = store.labels('type')[baseline.index.to_numpy()]
+
+    recurring = _decode(store, recurring)
+    flow = _recurring_flow(recurring, horizon[0].astype('int64'),
+                           horizon[-1].astype('int64') + 1)
+    projected = flow.groupby(['month', 'type'])['amount'].sum().unstack(fill_value=0.0)
+    projected = projected.reindex(index=horizon.astype('int64'),
+                                  columns=['Income', 'Expense'], fill_value=0.0)
+    result = pd.DataFrame({
+        'month': [str(month) for month in horizon],
+        'income': projected['Income'].to_numpy() + baseline.get('Income', 0.0),
+        'expense': projected['Expense'].to_numpy() + baseline.get('Expense', 0.0),
+    })
+    result['net'] = result['income'] - result['expense']
+    result['balance'] = store.aggregates.balance + result['net'].cumsum()
+    return recurring, result
@@ -0,0 +1,193 @@
+# importer.py
+import io
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+EXPENSE_CATEGORIES = ['Food', 'Transport', 'Shopping', 'Entertainment',
+                      'Bills', 'Health', 'Other']
+INCOME_CATEGORIES = ['Salary', 'Freelance', 'Investment', 'Gift', 'Other']
+PAYMENT_METHODS = ['Cash', 'Credit Card', 'Debit Card', 'Bank Transfer',
+                   'Digital Wallet']
+
+CHUNK_ROWS = 100_000
+HASH_COLUMNS = ['date', 'type', 'category', 'amount', 'description', 'payment_method']
+
+# Lower-cased statement vocabulary -> tracker values
+TYPE_ALIASES = {
+    'expense': 'Expense', 'debit': 'Expense', 'withdrawal': 'Expense',
+    'payment': 'Expense', 'pos': 'Expense', 'atm': 'Expense', 'fee': 'Expense',
+    'income': 'Income', 'credit': 'Income', 'deposit': 'Income',
+    'dep': 'Income', 'directdep': 'Income', 'int': 'Income', 'div': 'Income',
+}
+CATEGORY_ALIASES = {
+    'groceries': 'Food', 'restaurants': 'Food', 'dining': 'Food',
+    'travel': 'Transport', 'fuel': 'Transport', 'gas': 'Transport',
+    'utilities': 'Bills', 'rent': 'Bills', 'insurance': 'Bills',
+    'medical': 'Health', 'pharmacy': 'Health',
+    'payroll': 'Salary', 'wages': 'Salary', 'interest': 'Investment',
+    'dividends': 'Investment',
+}
+PAYMENT_ALIASES = {
+    'card': 'Credit Card', 'credit': 'Credit Card', 'debit': 'Debit Card',
+    'transfer': 'Bank Transfer', 'ach': 'Bank Transfer', 'wire': 'Bank Transfer',
+    'check': 'Bank Transfer', 'wallet': 'Digital Wallet', 'paypal': 'Digital Wallet',
+}
+COLUMN_ALIASES = {
+    'transaction date': 'date', 'posted date': 'date', 'posting date': 'date',
+    'transaction type': 'type', 'memo': 'description', 'name': 'description',
+    'payee': 'description', 'payment method': 'payment_method',
+    'method': 'payment_method', 'value': 'amount',
+}
+
+
+# Readers - each yields raw DataFrame chunks of string columns
+def _read_csv(buffer):
+    yield from pd.read_csv(buffer, dtype=str, keep_default_na=False,
+                           chunksize=CHUNK_ROWS)
+
+
+def _read_json(buffer):
+    text = buffer.read()
+    text = text.decode('utf-8') if isinstance(text, bytes) else text
+    if text.lstrip().startswith('['):
+        records = pd.DataFrame(json.loads(text))
+    else:   # JSON lines
+        records = pd.read_json(io.StringIO(text), lines=True, dtype=False)
+    records = records.fillna('').astype(str)
+    for start in range(0, len(records), CHUNK_ROWS):
+        yield records.iloc[start:start + CHUNK_ROWS]
+
+
+def _read_ofx(buffer):
+    text = buffer.read()
+    text = text.decode('utf-8', errors='replace') if isinstance(text, bytes) else text
+    blocks = pd.Series(text.split('<STMTTRN>')[1:], dtype=object)
+    blocks = blocks.str.split('</STMTTRN>').str[0]
+
+    def field(tag):
+        values = blocks.str.extract(rf'<{tag}>\s*([^<\r\n]*)', expand=False)
+        return values.fillna('').str.strip()
+
+    # No type column: TRNAMT is signed, which is more reliable than the many
+    # TRNTYPE codes (XFER, OTHER, SRVCHG, ...)
+    description = (field('NAME') + ' ' + field('MEMO')).str.strip()
+    for start in range(0, len(blocks), CHUNK_ROWS):
+        window = slice(start, start + CHUNK_ROWS)
+        yield pd.DataFrame({
+            'date': field('DTPOSTED')[window].str[:8],
+            'amount': field('TRNAMT')[window],
+            'description': description[window],
+        })
+
+
+READERS = {'.csv': _read_csv, '.json': _read_json, '.jsonl': _read_json,
+           '.ofx': _read_ofx, '.qfx': _read_ofx}
+
+
+def _lookup(values, known, aliases, default):
+    # Case-insensitive match against known values, then aliases, else default
+    table = {value.lower(): value for value in known}
+    table.update(aliases)
+    return values.str.strip().str.lower().map(table).fillna(default)
+
+
+def _parse_dates(values):
+    dates = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    retry = dates.isna() & (values.str.strip() != '')
+    if retry.any():   # slow path only for the rows that are not ISO 8601
+        dates[retry] = pd.to_datetime(values[retry], errors='coerce', format='mixed')
+    return dates
+
+
+# Normalize one raw chunk and split it into valid rows and per-reason rejects
+def normalize(chunk, expense_categories=EXPENSE_CATEGORIES):
+    chunk = chunk.rename(columns=lambda c: c.strip().lower()).rename(columns=COLUMN_ALIASES)
+    n = len(chunk)
+
+    def column(name):
+        if name not in chunk:
+            return pd.Series([''] * n, index=chunk.index)
+        return chunk[name].fillna('').astype(str)
+
+    amount = pd.to_numeric(column('amount').str.replace(r'[$,\s]', '', regex=True),
+                           errors='coerce')
+    raw_type = column('type').str.strip().str.lower()
+    # No type given - statements sign the amount instead
+    type_ = raw_type.map(TYPE_ALIASES).where(
+        raw_type != '', np.where(amount < 0, 'Expense', 'Income'))
+    date = _parse_dates(column('date'))
+
+    checks = {
+        'bad amount': amount.isna() | (amount == 0),
+        'bad date': date.isna(),
+        'unknown type': type_.isna(),
+    }
+    rejected = np.zeros(n, dtype=bool)
+    reasons = {}
+    for reason, failed in checks.items():
+        failed = failed.to_numpy() & ~rejected
+        reasons[reason] = int(failed.sum())
+        rejected |= failed
+    keep = ~rejected
+
+    known_categories = list(dict.fromkeys(list(expense_categories) + INCOME_CATEGORIES))
+    valid = pd.DataFrame({
+        'date': date[keep].to_numpy('datetime64[D]'),
+        'type': type_[keep].to_numpy(object),
+        'category': _lookup(column('category')[keep], known_categories,
+                            CATEGORY_ALIASES, 'Other').to_numpy(object),
+        'amount': amount[keep].abs().round(2).to_numpy('float64'),
+        'description': column('description')[keep].str.strip().to_numpy(object),
+        'payment_method': _lookup(column('payment_method')[keep], PAYMENT_METHODS,
+                                  PAYMENT_ALIASES, 'Bank Transfer').to_numpy(object),
+    })
+    return valid, reasons
+
+
+def content_hash(frame):
+    # Stable per-row hash of the user-visible fields, independent of the
+    # date/amount dtypes the frame happens to carry
+    return pd.util.hash_pandas_object(pd.DataFrame({
+        'date': pd.to_datetime(frame['date']).to_numpy('datetime64[D]').astype('int64'),
+        'type': frame['type'].astype(str).to_numpy(object),
+        'category': frame['category'].astype(str).to_numpy(object),
+        'amount': np.round(frame['amount'].to_numpy('float64') * 100).astype('int64'),
+        'description': frame['description'].astype(str).to_numpy(object),
+        'payment_method': frame['payment_method'].astype(str).to_numpy(object),
+    }), index=False).to_numpy()
+
+
+# Parse, validate and dedup a statement file, then append it in one batch.
+# Only rows already in the store count as duplicates - two identical coffees
+# on the same day inside one statement are both kept.
+def import_statement(buffer, filename, store, log, expense_categories=EXPENSE_CATEGORIES):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Unsupported file type: {extension or filename}")
+
+    chunks = []
+    rejected = {}
+    for raw in READERS[extension](buffer):
+        valid, reasons = normalize(raw, expense_categories)
+        chunks.append(valid)
+        for reason, count in reasons.items():
+            rejected[reason] = rejected.get(reason, 0) + count
+    if chunks:
+        batch = pd.concat(chunks, ignore_index=True)
+    else:
+        batch = pd.DataFrame(columns=HASH_COLUMNS)
+
+    duplicates = 0
+    if len(store) and len(batch):
+        is_duplicate = np.isin(content_hash(batch), content_hash(store.frame()))
+        duplicates = int(is_duplicate.sum())
+        batch = batch[~is_duplicate]
+
+    batch = batch.assign(timestamp=np.datetime64(datetime.now(), 'us'))
+    log.append_many(store, batch.reset_index(drop=True))
+    return {'imported': len(batch), 'duplicates': duplicates,
+            'rejected': sum(rejected.values()), 'reasons': rejected}
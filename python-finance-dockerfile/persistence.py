@@ -0,0 +1,150 @@
+# persistence.py
+import hashlib
+import json
+import os
+import re
+import threading
+
+import pandas as pd
+
+from transaction_store import COLUMNS, TransactionStore
+
+DATA_DIR = os.environ.get('FINANCE_DATA_DIR', 'data')
+COMPACT_EVERY = int(os.environ.get('FINANCE_COMPACT_EVERY', 10000))
+
+
+# Durable storage for a TransactionStore: every append is one JSON line in a
+# write-ahead log, and the log is periodically compacted into a Parquet
+# snapshot. Each WAL record carries its row number (seq) so records already
+# folded into the snapshot are skipped if a crash left them behind.
+class TransactionLog:
+    def __init__(self, data_dir=DATA_DIR, compact_every=COMPACT_EVERY):
+        os.makedirs(data_dir, exist_ok=True)
+        self.wal_path = os.path.join(data_dir, 'transactions.wal')
+        self.snapshot_path = os.path.join(data_dir, 'transactions.parquet')
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def load(self, store):
+        # Cold start: bulk-load the snapshot, then replay the WAL tail
+        snapshot_rows = 0
+        if os.path.exists(self.snapshot_path):
+            snapshot = pd.read_parquet(self.snapshot_path)
+            snapshot_rows = len(snapshot)
+            store.extend(snapshot)
+
+        records = []
+        if os.path.exists(self.wal_path):
+            with open(self.wal_path, 'r+b') as wal:
+                data = wal.read()
+                # A torn final write is cut off, so the next append starts on
+                # a fresh line instead of being glued to the partial one
+                end = data.rfind(b'\n') + 1
+                if end < len(data):
+                    wal.truncate(end)
+                    os.fsync(wal.fileno())
+            for line in data[:end].splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # garbled line left by an older torn write
+                if record['seq'] >= snapshot_rows:
+                    records.append(record)
+        if records:
+            store.extend(pd.DataFrame(records, columns=COLUMNS))
+        self._pending = len(records)
+
+    def append(self, store, transaction):
+        with self._lock:
+            record = dict(transaction, seq=len(store))
+            self._write(json.dumps(record) + '\n', lambda: store.append(transaction))
+            self._pending += 1
+            if self._pending >= self.compact_every:
+                self._compact(store)
+
+    def append_many(self, store, frame):
+        # Batch append: one WAL write for small batches, or straight into a
+        # new snapshot when the batch would trigger compaction anyway
+        if frame.empty:
+            return
+        with self._lock:
+            if self._pending + len(frame) >= self.compact_every:
+                store.extend(frame)
+                self._compact(store)
+                return
+            records = frame.assign(
+                date=frame['date'].dt.strftime('%Y-%m-%d'),
+                timestamp=frame['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f'),
+                seq=range(len(store), len(store) + len(frame)),
+            )
+            self._write(records.to_json(orient='records', lines=True), lambda: store.extend(frame))
+            self._pending += len(frame)
+
+    def _write(self, lines, apply):
+        # Make the records durable, then apply them to the store. If the
+        # store rejects them the WAL is cut back, so their seq is reused by
+        # the next append rather than replayed twice.
+        with open(self.wal_path, 'ab') as wal:
+            start = wal.tell()
+            wal.write(lines.encode('utf-8'))
+            wal.flush()
+            os.fsync(wal.fileno())
+            try:
+                apply()
+            except BaseException:
+                wal.truncate(start)
+                wal.flush()
+                os.fsync(wal.fileno())
+                raise
+
+    def compact(self, store):
+        with self._lock:
+            self._compact(store)
+
+    def _compact(self, store):
+        tmp_path = self.snapshot_path + '.tmp'
+        store.frame().to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.snapshot_path)
+        # Safe to drop the log now - every record in it has seq < len(snapshot)
+        open(self.wal_path, 'w').close()
+        self._pending = 0
+
+
+def partition_key(user_id):
+    # Directory name for a user id: a readable prefix plus a hash of the
+    # whole id, so ids that only differ in punctuation never share data
+    if not user_id or not user_id.strip():
+        raise ValueError("user id must not be blank")
+    readable = re.sub(r'[^A-Za-z0-9_-]', '_', user_id)[:32]
+    return f"{readable}-{hashlib.sha256(user_id.encode('utf-8')).hexdigest()[:32]}"
+
+
+# One store + log per user under DATA_DIR/users/<partition>, opened lazily
+# and shared by every session of that user in this process. Cold loads take
+# a per-partition lock, so one large load doesn't block other users.
+class PartitionRegistry:
+    def __init__(self, data_dir=DATA_DIR, compact_every=COMPACT_EVERY):
+        self.data_dir = data_dir
+        self.compact_every = compact_every
+        self._partitions = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._partitions)
+
+    def open(self, user_id):
+        key = partition_key(user_id)
+        if key in self._partitions:
+            return self._partitions[key]
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._partitions:
+                store = TransactionStore()
+                log = TransactionLog(os.path.join(self.data_dir, 'users', key),
+                                     self.compact_every)
+                log.load(store)
+                self._partitions[key] = (store, log)
+        return self._partitions[key]
@@ -0,0 +1,126 @@
+# profiling.py
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get('FINANCE_PROFILE', '') not in ('', '0')
+PORT = int(os.environ.get('FINANCE_PROFILE_PORT', '0'))   # 0 = no endpoint
+HISTORY = 10000          # most recent spans kept for export
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Named wall-clock spans grouped into runs (one Streamlit rerun each).
+# Spans nest per thread, so a chart build inside a page is recorded with
+# the page as its parent. Totals per span name are kept as Prometheus
+# histograms; individual spans are kept in a bounded ring buffer.
+class Profiler:
+    def __init__(self, history=HISTORY, buckets=BUCKETS):
+        self.buckets = buckets
+        self.spans = deque(maxlen=history)
+        self.counts = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self.sums = defaultdict(float)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def run(self, **labels):
+        self._local.run = {'run': uuid.uuid4().hex[:12], **labels}
+        self._local.stack = []
+        try:
+            yield self._local.run['run']
+        finally:
+            self._local.run = None
+
+    @contextmanager
+    def span(self, name):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            stack.pop()
+            self._record({**(getattr(self._local, 'run', None) or {}),
+                          'span': name, 'parent': parent, 'depth': len(stack),
+                          'start': started_at, 'seconds': duration})
+
+    def _record(self, span):
+        bucket = next((i for i, bound in enumerate(self.buckets)
+                       if span['seconds'] <= bound), len(self.buckets))
+        with self._lock:
+            self.spans.append(span)
+            self.counts[span['span']][bucket] += 1
+            self.sums[span['span']] += span['seconds']
+
+    def recent(self, run=None):
+        with self._lock:
+            spans = list(self.spans)
+        if run is not None:
+            spans = [span for span in spans if span.get('run') == run]
+        return spans
+
+    def summary(self):
+        with self._lock:
+            counts = {name: sum(buckets) for name, buckets in self.counts.items()}
+            sums = dict(self.sums)
+        return [{'span': name, 'count': counts[name], 'total_ms': sums[name] * 1000,
+                 'mean_ms': sums[name] / counts[name] * 1000}
+                for name in sorted(counts)]
+
+    def export_jsonl(self):
+        return ''.join(json.dumps(span) + '\n' for span in self.recent())
+
+    def prometheus_text(self):
+        with self._lock:
+            counts = {name: list(buckets) for name, buckets in self.counts.items()}
+            sums = dict(self.sums)
+        lines = ['# HELP finance_span_seconds Wall time of instrumented spans',
+                 '# TYPE finance_span_seconds histogram']
+        for name in sorted(counts):
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts[name]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'finance_span_seconds_bucket{{span="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'finance_span_seconds_sum{{span="{label}"}} {sums[name]}')
+            lines.append(f'finance_span_seconds_count{{span="{label}"}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        # /metrics in Prometheus text format, /spans as JSON lines
+        profiler = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = profiler.prometheus_text(), 'text/plain; version=0.0.4'
+                elif self.path == '/spans':
+                    body, content_type = profiler.export_jsonl(), 'application/x-ndjson'
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True,
+                         name='finance-profiler').start()
+        return server
@@ -0,0 +1,297 @@
+# transaction_store.py
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import AggregateEngine
+
+COLUMNS = ['date', 'type', 'category', 'amount', 'description',
+           'payment_method', 'timestamp']
+# String columns are stored as codes into a per-column dictionary
+ENCODED = {'type': 'int8', 'category': 'int16', 'payment_method': 'int16',
+           'description': 'int32'}
+
+
+# Growable typed buffer - capacity doubles so appends are amortized O(1)
+class _Column:
+    def __init__(self, dtype, capacity=1024):
+        self._buf = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def values(self):
+        # Writes only ever land past _size, so views handed out stay valid
+        return self._buf[:self._size]
+
+    def append(self, value):
+        if self._size == len(self._buf):
+            self._grow(self._size + 1)
+        self._buf[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._buf.dtype)
+        end = self._size + len(values)
+        if end > len(self._buf):
+            self._grow(end)
+        self._buf[self._size:end] = values
+        self._size = end
+
+    def _grow(self, needed):
+        buf = np.empty(max(needed, 2 * len(self._buf)), dtype=self._buf.dtype)
+        buf[:self._size] = self._buf[:self._size]
+        self._buf = buf
+
+
+# Distinct values of a string column in order of first appearance; a row
+# stores the value's position in this list
+class _Dictionary:
+    def __init__(self, dtype):
+        self.dtype = np.dtype(dtype)
+        self.values = []
+        self._codes = {}
+        self._labels = np.empty(0, dtype=object)
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            if len(self.values) > np.iinfo(self.dtype).max:
+                raise OverflowError(f"more than {len(self.values):,} distinct values")
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self, values):
+        inverse, uniques = pd.factorize(values, use_na_sentinel=False)
+        codes = np.array([self.code(value) for value in uniques], dtype=self.dtype)
+        return codes[inverse]
+
+    def lookup(self, values):
+        # Codes of the values that have been seen, unknown ones skipped
+        return [self._codes[value] for value in values if value in self._codes]
+
+    def labels(self):
+        # Object array for decoding with labels()[codes]
+        if len(self._labels) != len(self.values):
+            self._labels = np.empty(len(self.values), dtype=object)
+            self._labels[:] = self.values
+        return self._labels
+
+
+# Compact columnar transaction store: dates are int32 day numbers, amounts
+# int64 cents and string columns dictionary codes, about 60 bytes per row
+# including indexes. raw() hands out the stored arrays for vectorized
+# work; column(), take() and frame() decode to display values on demand.
+# The store is shared by every session of a user, so writes and the index
+# lookups that read several structures together hold one lock; raw views
+# and take() need none, since writes only land past a view's end.
+class TransactionStore:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._columns = {
+            'date': _Column('int32'),
+            'type': _Column(ENCODED['type']),
+            'category': _Column(ENCODED['category']),
+            'amount': _Column('int64'),
+            'description': _Column(ENCODED['description']),
+            'payment_method': _Column(ENCODED['payment_method']),
+            'timestamp': _Column('datetime64[us]'),
+        }
+        self._dictionaries = {name: _Dictionary(dtype) for name, dtype in ENCODED.items()}
+        self.aggregates = AggregateEngine()
+        # Row positions in date order (plus the day numbers in that order,
+        # for binary search) - extended in place while appends arrive in
+        # date order, re-sorted lazily after an out-of-order write
+        self._date_order = _Column('int64')
+        self._sorted_dates = _Column('int32')
+        self._date_order_valid = True
+        # Secondary indexes: code -> ascending row positions
+        self._indexes = {'type': {}, 'category': {}}
+        self.version = 0
+
+    def __len__(self):
+        return len(self._columns['date'])
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def raw(self, name):
+        # Stored array: day numbers, cents or dictionary codes
+        return self._columns[name].values
+
+    def labels(self, name):
+        return self._dictionaries[name].labels()
+
+    def column(self, name):
+        # Whole column decoded to display values - prefer raw() in hot paths
+        return self._decode(name, self.raw(name))
+
+    def _decode(self, name, values):
+        if name in ENCODED:
+            return self.labels(name)[values]
+        if name == 'date':
+            return values.astype('datetime64[D]')
+        if name == 'amount':
+            return values / 100
+        return values
+
+    def append(self, transaction):
+        with self._lock:
+            self._append(transaction)
+
+    def _append(self, transaction):
+        position = len(self)
+        row = {
+            'date': np.datetime64(transaction['date'], 'D').astype('int64'),
+            'amount': round(transaction['amount'] * 100),
+            'timestamp': transaction['timestamp'],
+            **{name: dictionary.code(transaction[name])
+               for name, dictionary in self._dictionaries.items()},
+        }
+        for name, column in self._columns.items():
+            column.append(row[name])
+        if self._date_order_valid:
+            if position == 0 or row['date'] >= self._sorted_dates.values[-1]:
+                self._date_order.append(position)
+                self._sorted_dates.append(row['date'])
+            else:
+                self._date_order_valid = False
+        for name, index in self._indexes.items():
+            if row[name] not in index:
+                index[row[name]] = _Column('int64', capacity=64)
+            index[row[name]].append(position)
+        self.aggregates.add(transaction['date'], transaction['type'],
+                            transaction['category'], row['amount'],
+                            transaction['payment_method'])
+        self.version += 1
+
+    def extend(self, frame):
+        # Bulk append of a DataFrame with the store's columns, one version bump
+        if frame.empty:
+            return
+        with self._lock:
+            self._extend(frame)
+
+    def _extend(self, frame):
+        start = len(self)
+        dates = np.asarray(frame['date'].to_numpy(), dtype='datetime64[D]')
+        self._columns['date'].extend(dates.astype('int64'))
+        self._columns['amount'].extend(
+            np.round(frame['amount'].to_numpy('float64') * 100).astype('int64'))
+        self._columns['timestamp'].extend(frame['timestamp'].to_numpy())
+        for name, dictionary in self._dictionaries.items():
+            self._columns[name].extend(dictionary.encode(frame[name]))
+        self._date_order_valid = False
+        for name, index in self._indexes.items():
+            codes = self.raw(name)[start:]
+            for code, offsets in pd.Series(codes).groupby(codes, sort=False).indices.items():
+                if code not in index:
+                    index[code] = _Column('int64', capacity=64)
+                index[code].extend(offsets + start)
+        self.aggregates.add_columns(
+            self.raw('date')[start:],
+            *(self._categorical(name, slice(start, None))
+              for name in ('type', 'category')),
+            self.raw('amount')[start:],
+            self._categorical('payment_method', slice(start, None)))
+        self.version += 1
+
+    def _categorical(self, name, positions=slice(None)):
+        return pd.Categorical.from_codes(self.raw(name)[positions],
+                                         categories=self._dictionaries[name].values,
+                                         validate=False)
+
+    def date_order(self):
+        # Positions sorted by date (stable, so ties keep insertion order)
+        with self._lock:
+            if not self._date_order_valid:
+                # Built aside and swapped in whole, so no one sees it half-filled
+                dates = self.raw('date')
+                order = np.argsort(dates, kind='stable')
+                date_order, sorted_dates = _Column('int64'), _Column('int32')
+                date_order.extend(order)
+                sorted_dates.extend(dates[order])
+                self._date_order, self._sorted_dates = date_order, sorted_dates
+                self._date_order_valid = True
+            return self._date_order.values
+
+    def date_span(self):
+        with self._lock:
+            self.date_order()
+            dates = self._sorted_dates.values[[0, -1]].astype('datetime64[D]')
+        return dates[0].item(), dates[-1].item()
+
+    def distinct(self, name):
+        # Indexed values in order of first appearance
+        with self._lock:
+            values = self._dictionaries[name].values
+            return [values[code] for code in self._indexes[name]]
+
+    def query(self, types=None, categories=None, start=None, end=None):
+        # Positions matching every filter, in date order. The date window is
+        # found by binary search; the smallest of the window and the indexed
+        # type/category position sets is then checked against the rest, so
+        # the cost follows the result size rather than the table size.
+        with self._lock:
+            return self._query(types, categories, start, end)
+
+    def _query(self, types, categories, start, end):
+        order = self.date_order()
+        sorted_dates = self._sorted_dates.values
+        # int32 bounds, so searchsorted doesn't upcast the whole index
+        start = None if start is None else np.datetime64(start, 'D').astype('int32')
+        end = None if end is None else np.datetime64(end, 'D').astype('int32')
+        lo = 0 if start is None else np.searchsorted(sorted_dates, start, 'left')
+        hi = len(order) if end is None else np.searchsorted(sorted_dates, end, 'right')
+        window = order[lo:hi]
+
+        filters = []
+        for name, selected in (('type', types), ('category', categories)):
+            index = self._indexes[name]
+            if selected is None:
+                continue
+            codes = self._dictionaries[name].lookup(selected)
+            if set(codes) >= index.keys():
+                continue
+            parts = [index[code].values for code in codes if code in index]
+            positions = np.concatenate(parts) if parts else np.empty(0, 'int64')
+            filters.append((name, codes, positions))
+
+        smallest = min([window] + [positions for _, _, positions in filters], key=len)
+        result = smallest
+        if result is not window:
+            dates = self.raw('date')[result]
+            keep = np.ones(len(result), dtype=bool)
+            if start is not None:
+                keep &= dates >= start
+            if end is not None:
+                keep &= dates <= end
+            result = result[keep]
+        for name, selected, positions in filters:
+            if positions is not smallest:
+                result = result[np.isin(self.raw(name)[result], selected)]
+        if smallest is not window:
+            # Same ordering as date_order(): by date, ties by position
+            result = result[np.lexsort((result, self.raw('date')[result]))]
+        return result
+
+    def take(self, positions):
+        # Decode only the requested rows, e.g. one page of a table
+        return pd.DataFrame({name: self._decode(name, self.raw(name)[positions])
+                             for name in self._columns})
+
+    def frame(self):
+        # Whole store as a DataFrame with categorical string columns (kept
+        # as dictionaries in Parquet) - built per call, not cached
+        return pd.DataFrame({
+            name: (self._categorical(name) if name in ENCODED
+                   else self._decode(name, self.raw(name)))
+            for name in self._columns
+        })